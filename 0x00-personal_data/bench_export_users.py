@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Benchmark of export_users against an SQLite stand-in of the users table
+
+Usage: ./bench_export_users.py [rows] [fetch_size]
+"""
+import csv
+import os
+import sqlite3
+import sys
+import time
+
+export_users = __import__('filtered_logger').export_users
+
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+fetch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+with open("user_data.csv", newline="") as f:
+    sample = list(csv.reader(f))
+header, records = sample[0], sample[1:]
+
+db = sqlite3.connect(":memory:")
+db.execute("CREATE TABLE users ({});".format(
+    ", ".join("{} TEXT".format(name) for name in header)))
+db.executemany(
+    "INSERT INTO users VALUES ({});".format(", ".join("?" * len(header))),
+    (records[i % len(records)] for i in range(rows)))
+
+with open(os.devnull, "w") as devnull:
+    start = time.perf_counter()
+    count = export_users(db, devnull, fetch_size=fetch_size)
+    elapsed = time.perf_counter() - start
+print("{:,} rows, fetch_size={}: {:,.0f} rows/s".format(
+    count, fetch_size, count / elapsed))
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Benchmark of filter_datum: regex rebuilt per line vs cached engine
+"""
+import re
+import time
+
+filter_datum = __import__('filtered_logger').filter_datum
+PII_FIELDS = __import__('filtered_logger').PII_FIELDS
+
+LINES = 200000
+message = "name=Bob;email=bob@dylan.com;phone=(473) 401-4253;" \
+          "ssn=000-123-0000;password=bobby2019;ip=60ed:c396:2ff:244;" \
+          "last_login=2019-11-14 06:14:24;user_agent=Mozilla/5.0;"
+
+
+def uncached(fields, redaction, message, separator):
+    """ Previous implementation, compiling the pattern on each call """
+    return re.sub(rf"({'|'.join(fields)})=[^{separator}]*",
+                  lambda m: f"{m.group(1)}={redaction}",
+                  message)
+
+
+for name, func in (("before", uncached), ("after", filter_datum)):
+    start = time.perf_counter()
+    for _ in range(LINES):
+        func(PII_FIELDS, "***", message, ";")
+    elapsed = time.perf_counter() - start
+    print("{}: {:,.0f} lines/s".format(name, LINES / elapsed))
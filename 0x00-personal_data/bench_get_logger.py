@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Check that N get_logger() calls leave one handler and cost one format()
+per record, then benchmark the memoized get_logger() call
+
+Usage: ./bench_get_logger.py [calls]
+"""
+import io
+import sys
+import time
+
+filtered_logger = __import__('filtered_logger')
+RedactingFormatter = filtered_logger.RedactingFormatter
+
+calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+RECORDS = 10
+formats = 0
+original_format = RedactingFormatter.format
+
+
+def counting_format(self, record):
+    """ RedactingFormatter.format, counting its calls """
+    global formats
+    formats += 1
+    return original_format(self, record)
+
+
+RedactingFormatter.format = counting_format
+stream = io.StringIO()
+sys.stderr, stderr = stream, sys.stderr
+try:
+    for async_ in (False, True):
+        formats = 0
+        for _ in range(calls):
+            logger = filtered_logger.get_logger(async_=async_)
+        assert len(logger.handlers) == 1, logger.handlers
+        for i in range(RECORDS):
+            logger.info("name=Bob;email=bob{}@dylan.com;".format(i))
+        filtered_logger.reset_loggers()
+        assert formats == RECORDS, (async_, formats)
+        print("{} get_logger() calls, {}: 1 handler, {} format() per "
+              "record".format(calls, "async" if async_ else "sync",
+                              formats // RECORDS), file=stderr)
+finally:
+    sys.stderr = stderr
+    RedactingFormatter.format = original_format
+assert stream.getvalue().count("email=***") == 2 * RECORDS
+
+start = time.perf_counter()
+for _ in range(100000):
+    filtered_logger.get_logger()
+elapsed = time.perf_counter() - start
+print("memoized get_logger(): {:.2f} us/call".format(elapsed / 100000 * 1e6))
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Benchmark of redact_csv on a generated user_data.csv-shaped file
+
+Usage: ./bench_redact_csv.py [rows] [processes]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+
+redact_csv = __import__('filtered_logger').redact_csv
+
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+with open("user_data.csv", newline="") as f:
+    sample = list(csv.reader(f))
+header, records = sample[0], sample[1:]
+
+with tempfile.TemporaryDirectory() as tmp:
+    src_path = os.path.join(tmp, "users.csv")
+    dst_path = os.path.join(tmp, "redacted.csv")
+    with open(src_path, "w", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(header)
+        for i in range(rows):
+            writer.writerow(records[i % len(records)])
+    print("{:,} rows, {:.0f} MB".format(
+        rows, os.path.getsize(src_path) / 1e6))
+
+    for workers in (0, processes):
+        with open(src_path, newline="") as src, \
+                open(dst_path, "w", newline="") as dst:
+            start = time.perf_counter()
+            redact_csv(src, dst, processes=workers)
+            elapsed = time.perf_counter() - start
+        print("processes={}: {:,.0f} rows/s".format(workers, rows / elapsed))
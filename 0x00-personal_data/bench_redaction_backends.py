@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the regex and tokenizer redaction backends
+"""
+import logging
+import random
+import time
+
+RedactingFormatter = __import__('filtered_logger').RedactingFormatter
+get_engine = __import__('filtered_logger').get_engine
+PII_FIELDS = __import__('filtered_logger').PII_FIELDS
+
+RECORDS = 100000
+messages = [
+    "name=egg;email=eggmin@eggsample.com;password=eggcellent;"
+    "date_of_birth=12/12/1986;",
+    "name=bob;email=bob@dylan.com;password=bobbycool;"
+    "date_of_birth=03/04/1993;",
+    "name=Bob;email=bob@dylan.com;ssn=000-123-0000;password=bobby2019;",
+]
+
+# Both backends must agree on random key=value payloads
+alphabet = "abe=;nmsw_ "
+keys = list(PII_FIELDS) + ["username", "ip", "x", ""]
+regex = get_engine(PII_FIELDS, "***", ";", "regex")
+tokenizer = get_engine(PII_FIELDS, "***", ";", "tokenizer")
+for _ in range(20000):
+    message = "".join(
+        random.choice(keys) + random.choice(["=", "", "=="]) +
+        "".join(random.choices(alphabet, k=random.randint(0, 6))) +
+        random.choice([";", ""])
+        for _ in range(random.randint(0, 6)))
+    assert regex.redact(message) == tokenizer.redact(message), message
+
+records = [logging.LogRecord("user_data", logging.INFO, None, None,
+                             messages[i % len(messages)], None, None)
+           for i in range(RECORDS)]
+for backend in ("regex", "tokenizer"):
+    formatter = RedactingFormatter(PII_FIELDS, backend=backend)
+    start = time.perf_counter()
+    for record in records:
+        formatter.format(record)
+    elapsed = time.perf_counter() - start
+    print("{}: {:,.0f} records/s".format(backend, RECORDS / elapsed))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Benchmark of structured (mapping) records vs the string redaction path
+"""
+import json
+import logging
+import time
+
+RedactingFormatter = __import__('filtered_logger').RedactingFormatter
+PII_FIELDS = __import__('filtered_logger').PII_FIELDS
+
+RECORDS = 100000
+payload = {"name": "Bob", "email": "bob@dylan.com", "ip": "60ed:c396",
+           "account": {"ssn": "000-123-0000", "password": "bobby2019"},
+           "devices": [{"phone": "(473) 401-4253", "os": "linux"}]}
+formatter = RedactingFormatter(PII_FIELDS)
+
+
+def structured():
+    """ Mapping msg, masked before a single encode """
+    return logging.LogRecord("user_data", logging.INFO, None, None,
+                             payload, None, None)
+
+
+def string():
+    """ Pre-serialized msg, as key=value pairs, scanned afterwards """
+    message = "".join("{}={};".format(k, json.dumps(v))
+                      for k, v in payload.items())
+    return logging.LogRecord("user_data", logging.INFO, None, None,
+                             message, None, None)
+
+
+print(formatter.format(structured()))
+for make_record in (string, structured):
+    start = time.perf_counter()
+    for _ in range(RECORDS):
+        formatter.format(make_record())
+    elapsed = time.perf_counter() - start
+    print("{}: {:,.0f} records/s".format(
+        make_record.__name__, RECORDS / elapsed))
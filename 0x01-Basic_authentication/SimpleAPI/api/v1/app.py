@@ -8,29 +8,38 @@ from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
 import os
 # import pdb
-import importlib
-from api.v1.auth.auth import Auth
+from api.v1.auth import get_auth
+from api.v1.auth.auth import PathMatcher
+from models.base import Base
 
 
 app = Flask(__name__)
 app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
 
-# initialize auth variable
-auth = None
+# Load auth instance based on AUTH_TYPE environment variable: only the
+# selected backend is imported
+auth = get_auth(getenv("AUTH_TYPE"))
 
-# Load auth instance based on AUTH_TYPE environment variable
-auth_type = getenv("AUTH_TYPE")
-if auth_type == "basic_auth":
-    # Import BasicAuth from api.v1.auth.basic_auth
-    basic_auth_module = importlib.import_module('api.v1.auth.basic_auth')
-    BasicAuth = basic_auth_module.BasicAuth
-    auth = BasicAuth()
-else:
-    # Import Auth from api.v1.auth.auth
-    auth_module = importlib.import_module('api.v1.auth.auth')
-    Auth = auth_module.Auth
-    auth = Auth()
+# Select how models persist: "file" rewrites the whole file on each
+# change, "journal" appends each change to a journal ("sqlite" is set up
+# in api.v1.views, before the models are loaded)
+if getenv("BASE_STORAGE") == "journal":
+    Base.JOURNAL = True
+# With BASE_FLUSH_INTERVAL (seconds), "file" writes are coalesced by a
+# background flusher instead of happening on every change
+if getenv("BASE_FLUSH_INTERVAL"):
+    Base.start_flusher(float(getenv("BASE_FLUSH_INTERVAL")))
+
+
+# List of paths that do not require authentication
+public_paths = [
+    '/api/v1/status/',
+    '/api/v1/unauthorized/',
+    '/api/v1/forbidden/',
+    '/api/v1/auth_session/login/']
+# Compiled once here rather than on the first request
+public_matcher = PathMatcher(public_paths)
 
 
 @app.before_request
@@ -40,18 +49,12 @@ def before_request():
     if auth is None:
         return
 
-    # List of paths that do not require authentication
-    public_paths = [
-        '/api/v1/status/',
-        '/api/v1/unauthorized/',
-        '/api/v1/forbidden/']
-
-    if request.path not in public_paths:
-        if auth.require_auth(request.path, public_paths):
-            if auth.authorization_header(request) is None:
-                abort(401)  # Unauthorized
-            if auth.current_user(request) is None:
-                abort(403)  # Forbidden
+    if auth.require_auth(request.path, public_matcher):
+        if auth.authorization_header(request) is None \
+                and auth.session_cookie(request) is None:
+            abort(401)  # Unauthorized
+        if auth.current_user(request) is None:
+            abort(403)  # Forbidden
 
 
 @app.errorhandler(404)
@@ -75,6 +78,13 @@ def forbidden(error) -> str:
     return jsonify({"error": "Forbidden"}), 403
 
 
+# API_METRICS=1 records per route and phase timings, served at
+# /api/v1/metrics, and API_PROFILE_EVERY=N also profiles every Nth request
+if getenv("API_METRICS") == "1":
+    from api.v1 import metrics
+    metrics.init_app(app, int(getenv("API_PROFILE_EVERY", "0")))
+
+
 if __name__ == "__main__":
     host = getenv("API_HOST", "0.0.0.0")
     port = getenv("API_PORT", "5000")
@@ -1 +1,34 @@
+#!/usr/bin/env python3
+""" Registry of authentication backends
 
+Backends are registered by AUTH_TYPE name with the module and class
+implementing them, and a module is only imported when its backend is
+selected.
+"""
+import importlib
+from typing import TypeVar
+
+AUTH_BACKENDS = {
+    "auth": ("api.v1.auth.auth", "Auth"),
+    "basic_auth": ("api.v1.auth.basic_auth", "BasicAuth"),
+    "token_auth": ("api.v1.auth.token_auth", "TokenAuth"),
+    "session_auth": ("api.v1.auth.session_auth", "SessionAuth"),
+    "session_db_auth": ("api.v1.auth.session_db_auth", "SessionDBAuth"),
+}
+
+
+def register_backend(auth_type: str, module: str, class_name: str):
+    """ Register the class class_name of module as the backend of
+    auth_type
+    """
+    AUTH_BACKENDS[auth_type] = (module, class_name)
+
+
+def get_auth(auth_type: str = None) -> TypeVar('Auth'):
+    """ Import, instantiate and warm up the backend of auth_type, or the
+    default Auth backend when auth_type is not registered
+    """
+    module, class_name = AUTH_BACKENDS.get(auth_type, AUTH_BACKENDS["auth"])
+    backend = getattr(importlib.import_module(module), class_name)()
+    backend.warm_up()
+    return backend
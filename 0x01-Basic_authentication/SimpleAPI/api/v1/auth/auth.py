@@ -2,29 +2,100 @@
 """ Authentication module """
 
 from flask import Request
-from typing import List, TypeVar
-# import pdb
+from functools import lru_cache
+from os import getenv
+from typing import List, Tuple, TypeVar, Union
 
 # Define a type variable 'User'
 User = TypeVar('User')
+# Lists of excluded paths up to this length are scanned, not compiled
+LINEAR_SCAN_LIMIT = 8
+
+
+class PathMatcher:
+    """ Compiled set of excluded paths
+
+    A path ending with '*' matches every path starting with what comes
+    before it, and is kept in a prefix trie. Other paths match exactly,
+    ignoring trailing slashes, and are kept in a set.
+    """
+
+    def __init__(self, excluded_paths: List[str]):
+        """ Compile the excluded paths """
+        self.exact = set()
+        self.trie = {}
+        self.size = 0
+        for excluded_path in excluded_paths:
+            self.size += 1
+            if excluded_path.endswith('*'):
+                node = self.trie
+                for char in excluded_path[:-1]:
+                    node = node.setdefault(char, {})
+                node[None] = True
+            else:
+                self.exact.add(excluded_path.rstrip('/'))
+
+    def match(self, path: str) -> bool:
+        """ Return True if path is excluded, in O(len(path)) """
+        if path.rstrip('/') in self.exact:
+            return True
+        node = self.trie
+        if None in node:
+            return True
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        """ Number of excluded paths """
+        return self.size
+
+
+def match_linear(path: str, excluded_paths: List[str]) -> bool:
+    """ Return True if path is excluded, scanning the list like
+    PathMatcher.match would match it """
+    stripped = path.rstrip('/')
+    for excluded_path in excluded_paths:
+        if excluded_path.endswith('*'):
+            if path.startswith(excluded_path[:-1]):
+                return True
+        elif stripped == excluded_path.rstrip('/'):
+            return True
+    return False
+
+
+@lru_cache(maxsize=64)
+def compile_paths(excluded_paths: Tuple[str, ...]) -> PathMatcher:
+    """ Return the PathMatcher of excluded paths, compiled once per
+    distinct tuple """
+    return PathMatcher(excluded_paths)
 
 
 class Auth:
-    def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
+    """ Authentication base class """
+
+    def require_auth(self, path: str,
+                     excluded_paths: Union[List[str], PathMatcher]) -> bool:
         """ Return True if authentication is required for the path,
-        else False """
-        # pdb.set_trace()
+        else False
+
+        excluded_paths is either a PathMatcher built once by the caller,
+        as the app does at startup, or a list of paths. Short lists are
+        scanned, and longer ones get a matcher memoized by their content.
+        """
         if path is None:
             return True
         if excluded_paths is None or len(excluded_paths) == 0:
             return True
-        # Ensure the path and excluded_paths are slash-tolerant
-        path = path.rstrip('/')
-        for excluded_path in excluded_paths:
-            excluded_path = excluded_path.rstrip('/')
-            if path == excluded_path:
-                return False
-        return True
+        if isinstance(excluded_paths, PathMatcher):
+            return not excluded_paths.match(path)
+        if len(excluded_paths) <= LINEAR_SCAN_LIMIT:
+            return not match_linear(path, excluded_paths)
+        return not compile_paths(tuple(excluded_paths)).match(path)
 
     def authorization_header(self, request: Request = None) -> str:
         """ Return the authorization header from the request """
@@ -35,3 +106,16 @@ class Auth:
     def current_user(self, request: Request = None) -> User:
         """ Return the current user from the request """
         return None
+
+    def session_cookie(self, request: Request = None) -> str:
+        """ Return the session cookie, named by SESSION_NAME, from the
+        request """
+        if request is None:
+            return None
+        return request.cookies.get(getenv("SESSION_NAME", "_my_session_id"))
+
+    def warm_up(self) -> None:
+        """ Prepare the backend once, before the first request """
+
+    def clear_cache(self) -> None:
+        """ Drop what the backend cached """
@@ -2,12 +2,31 @@
 """ Module for Basic Authentication
 """
 from api.v1.auth.auth import Auth
+from api.v1.auth.cache import CredentialCache
+from typing import TypeVar
+from models.user import User
 import base64
+import hashlib
 
 
 class BasicAuth(Auth):
     """ Basic Authentication class
     """
+
+    CACHE_SIZE = 10000
+    CACHE_TTL = 60
+
+    def __init__(self):
+        """ Initialize the credential cache
+        """
+        self.credential_cache = CredentialCache(self.CACHE_SIZE,
+                                                self.CACHE_TTL)
+
+    def clear_cache(self):
+        """ Forget every cached authentication
+        """
+        self.credential_cache.clear()
+
     def extract_base64_authorization_header(self, authorization_header: str) -> str:
         """ Extracts the Base64 part of the Authorization header
 
@@ -41,3 +60,47 @@ class BasicAuth(Auth):
             return None, None
         email, password = decoded_base64_authorization_header.split(':', 1)
         return email, password
+
+    def user_object_from_credentials(self, user_email: str,
+                                     user_pwd: str) -> TypeVar('User'):
+        """ Returns the User instance matching the email and password """
+        if not isinstance(user_email, str) or not isinstance(user_pwd, str):
+            return None
+        try:
+            users = User.search({'email': user_email})
+        except Exception:
+            return None
+        for user in users:
+            if user.is_valid_password(user_pwd):
+                return user
+        return None
+
+    def current_user(self, request=None) -> TypeVar('User'):
+        """ Returns the User authenticated by the request
+
+        Successful authentications are cached by a digest of the header.
+        A cached entry is only used while its user still exists with the
+        same email and password, so removing the user or changing them
+        invalidates it.
+        """
+        header = self.authorization_header(request)
+        if header is None:
+            return None
+        key = hashlib.sha256(header.encode()).hexdigest()
+        cached = self.credential_cache.get(key)
+        if cached is not None:
+            user_id, email, password = cached
+            user = User.get(user_id)
+            if user is not None and user.email == email \
+                    and user.password == password:
+                return user
+            self.credential_cache.discard(key)
+
+        base64_header = self.extract_base64_authorization_header(header)
+        decoded_header = self.decode_base64_authorization_header(base64_header)
+        email, password = self.extract_user_credentials(decoded_header)
+        user = self.user_object_from_credentials(email, password)
+        if user is not None:
+            self.credential_cache.set(key, (user.id, user.email,
+                                            user.password))
+        return user
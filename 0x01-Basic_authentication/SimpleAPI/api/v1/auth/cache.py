@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+""" Module of the caches shared by the authentication backends
+"""
+from collections import OrderedDict
+import threading
+import time
+
+
+class CredentialCache:
+    """ Bounded LRU cache, with expiry, of Authorization header digests
+    to the (user ID, email, password hash) they authenticated
+
+    SessionStore of session_auth extends it, so it lives apart from
+    the backends, which are only imported when selected.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        """ Initialize an empty cache
+
+        Args:
+            max_size (int): Maximum number of entries, 0 to disable
+            ttl (float): Seconds an entry stays valid
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple:
+        """ Return the value cached for key, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: tuple):
+        """ Cache value for key, evicting the least recently used entry
+        when full
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: str):
+        """ Remove key from the cache
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """ Remove every entry
+        """
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+""" Module for Session Authentication
+"""
+from api.v1.auth.auth import Auth
+from api.v1.auth.cache import CredentialCache
+from os import getenv
+from typing import TypeVar
+from models.user import User
+import threading
+import time
+import uuid
+
+
+class SessionStore(CredentialCache):
+    """ Bounded LRU map of session IDs to user IDs, with sliding expiry
+
+    Each lookup pushes the session's expiry back by ttl and moves it to
+    the most recently used end, so entries are always ordered by expiry
+    and sweep() only looks at the expired ones.
+    """
+
+    def get(self, key: str) -> str:
+        """ Return the user ID of a session and extend it, or None if
+        missing or expired
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < now:
+                del self._entries[key]
+                return None
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            return value
+
+    def sweep(self) -> int:
+        """ Remove the expired sessions, and return how many were removed
+        """
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            while self._entries:
+                key, (expires_at, _) = next(iter(self._entries.items()))
+                if expires_at >= now:
+                    break
+                del self._entries[key]
+                removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        """ Number of sessions, expired ones included until swept
+        """
+        return len(self._entries)
+
+
+class SessionAuth(Auth):
+    """ Session Authentication class
+
+    Requests authenticate with the session cookie set by
+    POST /api/v1/auth_session/login. Sessions expire after
+    SESSION_DURATION seconds without use, at most SESSION_SIZE are kept,
+    the least recently used being evicted first, and a background
+    thread sweeps expired sessions every SWEEP_INTERVAL seconds.
+    """
+
+    SESSION_SIZE = 100000
+    SWEEP_INTERVAL = 60
+
+    def __init__(self):
+        """ Initialize an empty session store
+        """
+        try:
+            duration = float(getenv("SESSION_DURATION", "3600"))
+        except ValueError:
+            duration = 3600
+        self.session_duration = duration
+        self.user_id_by_session_id = SessionStore(self.SESSION_SIZE,
+                                                  duration)
+        self._sweeper = None
+
+    def warm_up(self):
+        """ Start the sweeper thread
+        """
+        self.start_sweeper(self.SWEEP_INTERVAL)
+
+    def clear_cache(self):
+        """ Drop every session
+        """
+        self.user_id_by_session_id.clear()
+
+    def start_sweeper(self, interval: float):
+        """ Start a background thread removing expired sessions every
+        interval seconds
+        """
+        if self._sweeper is not None:
+            return
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.sweep()
+
+        thread = threading.Thread(target=run, daemon=True)
+        self._sweeper = (thread, stop)
+        thread.start()
+
+    def sweep(self):
+        """ Remove the expired sessions
+        """
+        self.user_id_by_session_id.sweep()
+
+    def stop_sweeper(self):
+        """ Stop the sweeper thread
+        """
+        if self._sweeper is None:
+            return
+        thread, stop = self._sweeper
+        self._sweeper = None
+        stop.set()
+        thread.join()
+
+    def create_session(self, user_id: str = None) -> str:
+        """ Creates a session for a user ID and returns its ID """
+        if not isinstance(user_id, str):
+            return None
+        session_id = str(uuid.uuid4())
+        self.user_id_by_session_id.set(session_id, user_id)
+        return session_id
+
+    def user_id_for_session_id(self, session_id: str = None) -> str:
+        """ Returns the user ID of a session, extending the session """
+        if not isinstance(session_id, str):
+            return None
+        return self.user_id_by_session_id.get(session_id)
+
+    def current_user(self, request=None) -> TypeVar('User'):
+        """ Returns the User of the request's session cookie """
+        user_id = self.user_id_for_session_id(self.session_cookie(request))
+        if user_id is None:
+            return None
+        return User.get(user_id)
+
+    def destroy_session(self, request=None) -> bool:
+        """ Deletes the request's session, returning False if it has
+        none """
+        session_id = self.session_cookie(request)
+        if self.user_id_for_session_id(session_id) is None:
+            return False
+        self.user_id_by_session_id.discard(session_id)
+        return True
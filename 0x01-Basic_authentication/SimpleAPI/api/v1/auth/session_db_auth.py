@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+""" Module for Session Authentication persisted in SQLite
+"""
+from api.v1.auth.session_auth import SessionAuth
+from models.sqlite_store import SQLITE_PATH, connect
+import sqlite3
+import time
+import uuid
+
+
+PURGE_BATCH_SIZE = 1000
+SQL_CREATE = ("CREATE TABLE IF NOT EXISTS sessions (session_id TEXT "
+              "PRIMARY KEY, user_id TEXT NOT NULL, created_at REAL NOT "
+              "NULL, expires_at REAL NOT NULL)")
+SQL_INDEX = ("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions "
+             "(expires_at)")
+SQL_INSERT = ("INSERT INTO sessions (session_id, user_id, created_at, "
+              "expires_at) VALUES (?, ?, ?, ?)")
+SQL_GET = "SELECT user_id, expires_at FROM sessions WHERE session_id = ?"
+SQL_EXTEND = ("INSERT INTO sessions (session_id, user_id, created_at, "
+              "expires_at) VALUES (?, ?, ?, ?) ON CONFLICT(session_id) DO "
+              "UPDATE SET expires_at = excluded.expires_at")
+SQL_DELETE = "DELETE FROM sessions WHERE session_id = ?"
+SQL_PURGE = ("DELETE FROM sessions WHERE session_id IN (SELECT session_id "
+             "FROM sessions WHERE expires_at < ? LIMIT ?)")
+
+
+class SessionDBAuth(SessionAuth):
+    """ Session Authentication class whose sessions survive restarts
+
+    Sessions are rows of the sessions table of the SQLite database of
+    the models, keyed by session ID and indexed by expiry. The session
+    store of SessionAuth is kept in front of it as a write-through
+    cache: sessions are written to both, and read from the table only
+    on a cache miss, so nothing is loaded at startup.
+
+    The sliding expiry is written back to the table at most once per
+    REFRESH_INTERVAL seconds per session, or per half the session
+    duration if shorter. The row can thus expire, and be purged, while
+    the cached session is still live, so the write-back is an upsert
+    that puts the row back. The sweeper deletes the expired rows
+    PURGE_BATCH_SIZE at a time.
+    """
+
+    REFRESH_INTERVAL = 60
+
+    def __init__(self, db_path: str = SQLITE_PATH):
+        """ Initialize an empty cache in front of the sessions table
+        """
+        super().__init__()
+        self.db_path = db_path
+        db = self.connection()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(SQL_CREATE)
+        db.execute(SQL_INDEX)
+
+    def connection(self) -> sqlite3.Connection:
+        """ Return the connection of the current thread
+        """
+        return connect(self.db_path)
+
+    def create_session(self, user_id: str = None) -> str:
+        """ Creates a session for a user ID and returns its ID """
+        if not isinstance(user_id, str):
+            return None
+        session_id = str(uuid.uuid4())
+        now = time.time()
+        expires_at = now + self.session_duration
+        self.connection().execute(SQL_INSERT,
+                                  (session_id, user_id, now, expires_at))
+        self.user_id_by_session_id.set(session_id, (user_id, expires_at))
+        return session_id
+
+    def user_id_for_session_id(self, session_id: str = None) -> str:
+        """ Returns the user ID of a session, extending the session """
+        if not isinstance(session_id, str):
+            return None
+        now = time.time()
+        cached = self.user_id_by_session_id.get(session_id)
+        miss = cached is None
+        if miss:
+            cached = self.connection().execute(SQL_GET,
+                                               (session_id,)).fetchone()
+            if cached is None:
+                return None
+            if cached[1] < now:
+                self.connection().execute(SQL_DELETE, (session_id,))
+                return None
+        user_id, expires_at = cached
+        interval = min(self.REFRESH_INTERVAL, self.session_duration / 2)
+        refresh = now + self.session_duration - expires_at > interval
+        if refresh:
+            expires_at = now + self.session_duration
+            self.connection().execute(
+                SQL_EXTEND, (session_id, user_id, now, expires_at))
+        if miss or refresh:
+            self.user_id_by_session_id.set(session_id, (user_id, expires_at))
+        return user_id
+
+    def destroy_session(self, request=None) -> bool:
+        """ Deletes the request's session, returning False if it has
+        none """
+        session_id = self.session_cookie(request)
+        if self.user_id_for_session_id(session_id) is None:
+            return False
+        self.user_id_by_session_id.discard(session_id)
+        self.connection().execute(SQL_DELETE, (session_id,))
+        return True
+
+    def sweep(self):
+        """ Remove the expired sessions from the cache, then from the
+        table in batches
+        """
+        super().sweep()
+        self.purge()
+
+    def purge(self, batch_size: int = PURGE_BATCH_SIZE) -> int:
+        """ Delete the expired rows batch_size at a time, and return how
+        many were deleted
+        """
+        db = self.connection()
+        now = time.time()
+        deleted = 0
+        while True:
+            count = db.execute(SQL_PURGE, (now, batch_size)).rowcount
+            deleted += count
+            if count < batch_size:
+                return deleted
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+""" Module for Token Authentication
+"""
+from api.v1.auth.auth import Auth
+from os import getenv
+from typing import TypeVar
+from models.user import User
+import hashlib
+
+
+class TokenAuth(Auth):
+    """ Token Authentication class
+
+    Requests authenticate with "Authorization: Bearer <token>", where
+    the tokens and their user IDs come from AUTH_TOKENS, as comma
+    separated "<token>:<user ID>" pairs.
+    """
+
+    def __init__(self):
+        """ Initialize an empty token table
+        """
+        self.tokens = {}
+
+    def warm_up(self):
+        """ Load AUTH_TOKENS, keeping only a digest of each token
+        """
+        tokens = {}
+        for pair in getenv("AUTH_TOKENS", "").split(","):
+            token, separator, user_id = pair.strip().partition(":")
+            if separator and token:
+                tokens[self.digest(token)] = user_id
+        self.tokens = tokens
+
+    def clear_cache(self):
+        """ Reload AUTH_TOKENS
+        """
+        self.warm_up()
+
+    @staticmethod
+    def digest(token: str) -> str:
+        """ Returns the SHA-256 digest of a token """
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def extract_token(self, authorization_header: str) -> str:
+        """ Extracts the token of a Bearer Authorization header """
+        if not isinstance(authorization_header, str):
+            return None
+        if not authorization_header.startswith("Bearer "):
+            return None
+        return authorization_header[7:]
+
+    def current_user(self, request=None) -> TypeVar('User'):
+        """ Returns the User the request's token belongs to """
+        token = self.extract_token(self.authorization_header(request))
+        if token is None:
+            return None
+        user_id = self.tokens.get(self.digest(token))
+        if user_id is None:
+            return None
+        return User.get(user_id)
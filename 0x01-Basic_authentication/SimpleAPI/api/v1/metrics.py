@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+""" Opt-in request instrumentation for the API
+
+Records per-route histograms of the time spent in the auth check
+(before_request), the view and JSON serialization (jsonify() and the
+JSON fragments of models), optionally profiles
+every Nth request with cProfile, and serves the results at
+/api/v1/metrics and /api/v1/metrics/profile. Nothing is hooked into the
+app unless init_app() is called.
+"""
+from flask import Flask, Response, g, has_request_context, request
+from models.base import Base
+from typing import Callable
+import cProfile
+import io
+import pstats
+import threading
+import time
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+           0.5, 1.0, 2.5)
+
+
+class Histogram:
+    """ Cumulative histogram of durations in seconds
+    """
+
+    def __init__(self):
+        """ Initialize empty buckets """
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """ Record one duration """
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                break
+        else:
+            i = len(BUCKETS)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """ Phase histograms by route, and sampled profiles
+    """
+
+    def __init__(self, profile_every: int = 0):
+        """ Initialize the metrics
+
+        Args:
+            profile_every (int): Profile one request out of this many,
+                0 to never profile
+        """
+        self.profile_every = profile_every
+        self.histograms = {}
+        self.requests = 0
+        self.stats = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def route() -> str:
+        """ Returns the URL rule of the current request """
+        if request.url_rule is None:
+            return "unmatched"
+        return request.url_rule.rule
+
+    def observe(self, phase: str, value: float):
+        """ Record the duration of a phase of the current request """
+        key = (self.route(), phase)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def add_serialization(self, elapsed: float):
+        """ Record time spent encoding JSON: added to the serialization
+        of the current view if one runs, else recorded on its own
+        """
+        if "metrics_serialization" in g:
+            g.metrics_serialization += elapsed
+        else:
+            self.observe("serialization", elapsed)
+
+    def timed(self, phase: str, func: Callable) -> Callable:
+        """ Wrap func to record its duration as phase """
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(phase, time.perf_counter() - start)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    def timed_view(self, func: Callable) -> Callable:
+        """ Wrap a view to record its duration as "handler", minus the
+        JSON serialization it did, recorded once as "serialization"
+        """
+        def wrapper(*args, **kwargs):
+            g.metrics_serialization = 0.0
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                serialization = g.pop("metrics_serialization")
+                self.observe("handler", elapsed - serialization)
+                if serialization > 0:
+                    self.observe("serialization", serialization)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    def start_profile(self):
+        """ Start profiling one request out of profile_every """
+        with self._lock:
+            self.requests += 1
+            sampled = self.requests % self.profile_every == 0
+        if sampled:
+            g.metrics_profile = cProfile.Profile()
+            g.metrics_profile.enable()
+
+    def stop_profile(self, exception: Exception = None):
+        """ Stop profiling the request and merge its statistics """
+        profile = g.pop("metrics_profile", None)
+        if profile is None:
+            return
+        profile.disable()
+        with self._lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+
+    def render(self) -> str:
+        """ Returns the histograms in the Prometheus text format """
+        lines = [
+            "# HELP api_phase_seconds Time spent per route and phase",
+            "# TYPE api_phase_seconds histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            for (route, phase), histogram in histograms:
+                labels = 'route="{}",phase="{}"'.format(route, phase)
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",),
+                                        histogram.counts):
+                    cumulative += count
+                    lines.append('api_phase_seconds_bucket{{{},le="{}"}} {}'
+                                 .format(labels, bound, cumulative))
+                lines.append("api_phase_seconds_sum{{{}}} {}".format(
+                    labels, histogram.sum))
+                lines.append("api_phase_seconds_count{{{}}} {}".format(
+                    labels, histogram.count))
+        return "\n".join(lines) + "\n"
+
+    def render_profile(self) -> str:
+        """ Returns the 30 costliest functions of the sampled requests """
+        out = io.StringIO()
+        with self._lock:
+            if self.stats is None:
+                return "no profiled request\n"
+            self.stats.stream = out
+            self.stats.sort_stats("cumulative").print_stats(30)
+        return out.getvalue()
+
+
+def init_app(app: Flask, profile_every: int = 0) -> Metrics:
+    """ Instrument app, once its views and before_request functions are
+    registered, and add the metrics endpoints
+    """
+    metrics = Metrics(profile_every)
+
+    funcs = app.before_request_funcs.setdefault(None, [])
+    funcs[:] = [metrics.timed("auth", func) for func in funcs]
+    for endpoint, view in list(app.view_functions.items()):
+        if endpoint != "static":
+            app.view_functions[endpoint] = metrics.timed_view(view)
+
+    class TimedJSONEncoder(app.json_encoder):
+        """ JSON encoder recording its duration as "serialization" """
+
+        def encode(self, o) -> str:
+            """ Encode o and record the duration """
+            if not has_request_context():
+                return super().encode(o)
+            start = time.perf_counter()
+            try:
+                return super().encode(o)
+            finally:
+                metrics.add_serialization(time.perf_counter() - start)
+
+    app.json_encoder = TimedJSONEncoder
+
+    # The users views send pre-encoded fragments instead of jsonify()
+    json_fragment = Base.json_fragment
+
+    def timed_json_fragment(self) -> str:
+        """ Base.json_fragment, recording its duration as
+        "serialization" """
+        if not has_request_context():
+            return json_fragment(self)
+        start = time.perf_counter()
+        try:
+            return json_fragment(self)
+        finally:
+            metrics.add_serialization(time.perf_counter() - start)
+
+    Base.json_fragment = timed_json_fragment
+
+    if profile_every > 0:
+        funcs.insert(0, metrics.start_profile)
+        app.teardown_request(metrics.stop_profile)
+
+    app.add_url_rule(
+        "/api/v1/metrics", "metrics",
+        lambda: Response(metrics.render(),
+                         mimetype="text/plain; version=0.0.4"))
+    app.add_url_rule(
+        "/api/v1/metrics/profile", "metrics_profile",
+        lambda: Response(metrics.render_profile(), mimetype="text/plain"))
+    return metrics
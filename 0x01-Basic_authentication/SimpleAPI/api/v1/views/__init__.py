@@ -2,10 +2,19 @@
 """ DocDocDocDocDocDoc
 """
 from flask import Blueprint
+from os import getenv
 
 app_views = Blueprint("app_views", __name__, url_prefix="/api/v1")
 
 from api.v1.views.index import *
 from api.v1.views.users import *
+from api.v1.views.session_auth import *
 
+# BASE_STORAGE=sqlite keeps models in a SQLite database instead of in
+# memory, and must be set before they are loaded
+if getenv("BASE_STORAGE") == "sqlite":
+    User.SQLITE = True
+# BASE_LOAD=lazy builds each User on first access instead of at startup
+if getenv("BASE_LOAD") == "lazy":
+    User.LAZY = True
 User.load_from_file()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+""" Module of Session authentication views
+"""
+from api.v1.views import app_views
+from flask import abort, jsonify, request
+from models.user import User
+from os import getenv
+
+
+@app_views.route('/auth_session/login', methods=['POST'],
+                 strict_slashes=False)
+def session_login() -> str:
+    """ POST /api/v1/auth_session/login
+    Form body:
+      - email
+      - password
+    Return:
+      - User object JSON represented, with the session cookie set
+      - 400 if email or password is missing
+      - 404 if no User has this email
+      - 401 if the password is wrong
+    """
+    email = request.form.get("email")
+    if not email:
+        return jsonify({"error": "email missing"}), 400
+    password = request.form.get("password")
+    if not password:
+        return jsonify({"error": "password missing"}), 400
+    users = User.search({"email": email})
+    if len(users) == 0:
+        return jsonify({"error": "no user found for this email"}), 404
+    user = next((u for u in users if u.is_valid_password(password)), None)
+    if user is None:
+        return jsonify({"error": "wrong password"}), 401
+
+    from api.v1.app import auth
+    create_session = getattr(auth, "create_session", None)
+    if create_session is None:
+        abort(404)
+    response = jsonify(user.to_json())
+    response.set_cookie(getenv("SESSION_NAME", "_my_session_id"),
+                        create_session(user.id), httponly=True)
+    return response
+
+
+@app_views.route('/auth_session/logout', methods=['DELETE'],
+                 strict_slashes=False)
+def session_logout() -> str:
+    """ DELETE /api/v1/auth_session/logout
+    Return:
+      - empty JSON if the session has been deleted, with the session
+        cookie cleared
+      - 404 if the request has no session
+    """
+    from api.v1.app import auth
+    destroy_session = getattr(auth, "destroy_session", None)
+    if destroy_session is None or not destroy_session(request):
+        abort(404)
+    response = jsonify({})
+    response.delete_cookie(getenv("SESSION_NAME", "_my_session_id"))
+    return response
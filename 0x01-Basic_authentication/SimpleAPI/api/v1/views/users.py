@@ -2,18 +2,59 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import Response, abort, jsonify, request
 from models.user import User
 
 
+PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters:
+      - limit (optional): number of users to return, in ID order
+      - after (optional): ID of the last user of the previous page
+      - stream (optional): 1 to stream the whole list
     Return:
-      - list of all User objects JSON represented
+      - list of all User objects JSON represented, or one page of it
+        when limit or after is given
+      - 400 if limit is not a number between 1 and MAX_PAGE_LIMIT
+    """
+    limit = request.args.get("limit")
+    after = request.args.get("after")
+    if limit is not None or after is not None:
+        try:
+            limit = PAGE_LIMIT if limit is None else int(limit)
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= MAX_PAGE_LIMIT:
+            return jsonify({'error': "Wrong limit"}), 400
+        page = ",".join(user.json_fragment()
+                        for user in User.page(limit, after))
+        return Response("[{}]\n".format(page), mimetype="application/json")
+
+    if request.args.get("stream") == "1":
+        return Response(stream_all_users(), mimetype="application/json")
+
+    all_users = ",".join(user.json_fragment() for user in User.all())
+    return Response("[{}]\n".format(all_users), mimetype="application/json")
+
+
+def stream_all_users():
+    """ Yield the JSON list of all users one page at a time
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    yield "["
+    after = None
+    while True:
+        users = User.page(MAX_PAGE_LIMIT, after)
+        if len(users) == 0:
+            break
+        page = ",".join(user.json_fragment() for user in users)
+        yield page if after is None else ",{}".format(page)
+        after = users[-1].id
+    yield "]\n"
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -30,7 +71,8 @@ def view_one_user(user_id: str = None) -> str:
     user = User.get(user_id)
     if user is None:
         abort(404)
-    return jsonify(user.to_json())
+    return Response("{}\n".format(user.json_fragment()),
+                    mimetype="application/json")
 
 
 @app_views.route('/users/<user_id>', methods=['DELETE'], strict_slashes=False)
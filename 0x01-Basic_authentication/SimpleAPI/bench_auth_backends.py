@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+""" Benchmark of the auth backends: startup time of get_auth() in a
+fresh interpreter, and per-request dispatch cost of the before_request
+checks
+
+Usage: ./bench_auth_backends.py [requests]
+"""
+import base64
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from api.v1.auth import AUTH_BACKENDS, get_auth
+from models.base import DATA
+from models.user import User
+
+requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+public_paths = ['/api/v1/status/', '/api/v1/unauthorized/',
+                '/api/v1/forbidden/']
+
+
+class MockRequest:
+    """ Request holding only a path, headers and cookies """
+    def __init__(self, path, headers, cookies={}):
+        self.path = path
+        self.headers = headers
+        self.cookies = cookies
+
+
+DATA["User"] = {}
+user = User(email="bob@hbtn.io")
+user.password = "pwd"
+DATA["User"][user.id] = user
+User.reindex()
+os.environ["AUTH_TOKENS"] = "s3cr3t:{}".format(user.id)
+headers = {
+    "auth": {},
+    "basic_auth": {"Authorization": "Basic {}".format(
+        base64.b64encode(b"bob@hbtn.io:pwd").decode())},
+    "token_auth": {"Authorization": "Bearer s3cr3t"},
+}
+os.chdir(tempfile.mkdtemp())
+
+for auth_type in AUTH_BACKENDS:
+    code = "import time; s = time.perf_counter(); " \
+           "from api.v1.auth import get_auth; get_auth({!r}); " \
+           "print(time.perf_counter() - s)".format(auth_type)
+    startup = float(subprocess.run(
+        [sys.executable, "-c", code],
+        env=dict(os.environ, PYTHONPATH=":".join(sys.path)),
+        capture_output=True, text=True, check=True).stdout)
+
+    auth = get_auth(auth_type)
+    cookies = {}
+    if hasattr(auth, "create_session"):
+        cookies["_my_session_id"] = auth.create_session(user.id)
+    request = MockRequest("/api/v1/users", headers.get(auth_type, {}),
+                          cookies)
+    start = time.perf_counter()
+    for _ in range(requests):
+        if auth.require_auth(request.path, public_paths):
+            auth.authorization_header(request)
+            assert auth_type == "auth" or auth.current_user(request)
+    elapsed = time.perf_counter() - start
+    print("{}: startup {:.1f} ms, dispatch {:.2f} us/request".format(
+        auth_type, startup * 1000, elapsed / requests * 1e6))
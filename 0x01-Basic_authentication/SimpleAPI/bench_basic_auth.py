@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+""" Benchmark of BasicAuth.current_user, with and without the credential
+cache
+
+Usage: ./bench_basic_auth.py [users] [requests]
+"""
+import base64
+import sys
+import time
+
+from api.v1.auth.basic_auth import BasicAuth
+from models.base import DATA
+from models.user import User
+
+users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+
+class MockRequest:
+    """ Request holding only headers """
+    def __init__(self, headers):
+        self.headers = headers
+
+
+DATA["User"] = {}
+for i in range(users):
+    user = User(email="user{}@hbtn.io".format(i))
+    user.password = "pwd{}".format(i)
+    DATA["User"][user.id] = user
+User.reindex()
+
+credentials = "user{0}@hbtn.io:pwd{0}".format(users - 1).encode()
+request = MockRequest({"Authorization": "Basic {}".format(
+    base64.b64encode(credentials).decode())})
+
+for cache_size in (0, BasicAuth.CACHE_SIZE):
+    BasicAuth.CACHE_SIZE = cache_size
+    auth = BasicAuth()
+    start = time.perf_counter()
+    for _ in range(requests):
+        assert auth.current_user(request) is not None
+    elapsed = time.perf_counter() - start
+    print("{:,} users, cache {}: {:,.0f} requests/s".format(
+        users, "on" if cache_size else "off", requests / elapsed))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+""" Stress test of concurrent User reads and writes, then benchmark of
+User.get / search / page throughput as the reader threads grow
+
+Usage: [BASE_LOAD=lazy] ./bench_concurrency.py [users] [seconds]
+
+Reads take no lock, so their throughput is bounded by the GIL and not
+by the writers: it stays flat, not linear, as reader threads are added.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from models.base import Base, DATA, INDEXES, ORDERED_IDS, VERSIONS
+from models.user import User
+
+users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+WRITERS = 4
+READERS = 4
+
+os.chdir(tempfile.mkdtemp())
+with open(".db_User.json", "w") as f:
+    json.dump({str(i): {"id": str(i), "email": "user{}@hbtn.io".format(i),
+                        "_password": None,
+                        "created_at": "2024-01-01T00:00:00",
+                        "updated_at": "2024-01-01T00:00:00"}
+               for i in range(users)}, f)
+User.LAZY = os.getenv("BASE_LOAD") == "lazy"
+User.load_from_file()
+User.page(1)
+Base.start_flusher(0.1)
+
+stop = threading.Event()
+errors = []
+counts = {}
+
+
+def worker(name, step):
+    """ Run step until stop, recording its errors and iterations """
+    rng = random.Random(name)
+    done = 0
+    try:
+        while not stop.is_set():
+            step(rng)
+            done += 1
+    except Exception as e:
+        errors.append((name, repr(e)))
+    counts[name] = done
+
+
+def write(rng):
+    """ Create, update or remove a random user """
+    user = User.get(str(rng.randrange(users * 2)))
+    if user is None:
+        user = User(id=str(rng.randrange(users * 2)),
+                    email="new{}@hbtn.io".format(rng.random()))
+        user.save()
+    elif rng.random() < 0.5:
+        user.email = "moved{}@hbtn.io".format(rng.random())
+        user.save()
+    else:
+        user.remove()
+
+
+def read(rng):
+    """ Get, search by email, page and encode random users """
+    i = rng.randrange(users)
+    user = User.get(str(i))
+    if user is not None:
+        user.json_fragment()
+    for found in User.search({"email": "user{}@hbtn.io".format(i)}):
+        assert found.email == "user{}@hbtn.io".format(i)
+    User.page(50, str(i))
+    User.count()
+
+
+threads = [threading.Thread(target=worker, args=("w{}".format(i), write))
+           for i in range(WRITERS)]
+threads += [threading.Thread(target=worker, args=("r{}".format(i), read))
+            for i in range(READERS)]
+for thread in threads:
+    thread.start()
+time.sleep(seconds)
+stop.set()
+for thread in threads:
+    thread.join()
+Base.stop_flusher()
+
+assert not errors, errors
+objs = DATA["User"]
+assert ORDERED_IDS["User"] == sorted(objs.keys())
+assert set(VERSIONS["User"]) <= set(objs.keys())
+for email, bucket in INDEXES["User"]["email"].items():
+    for obj_id in bucket:
+        assert objs[obj_id].email == email
+assert sum(len(b) for b in INDEXES["User"]["email"].values()) == len(objs)
+with open(".db_User.json") as f:
+    assert set(json.load(f)) == set(objs)
+print("stress: {} writes, {} reads, {:,} users, consistent".format(
+    sum(v for k, v in counts.items() if k[0] == "w"),
+    sum(v for k, v in counts.items() if k[0] == "r"), len(objs)))
+
+for n in (1, 2, 4, 8):
+    stop.clear()
+    counts.clear()
+    threads = [threading.Thread(target=worker, args=("r{}".format(i), read))
+               for i in range(n)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    print("{} reader threads: {:,.0f} reads/s".format(
+        n, sum(counts.values()) / seconds))
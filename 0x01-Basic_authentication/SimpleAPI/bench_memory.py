@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+""" Benchmark of memory per User, default vs compact (BASE_COMPACT=1)
+layout
+
+Usage: ./bench_memory.py [users]
+"""
+import os
+import subprocess
+import sys
+import tracemalloc
+
+users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+if os.getenv("BENCH_CHILD") is None:
+    for compact in ("0", "1"):
+        env = dict(os.environ, BENCH_CHILD="1", BASE_COMPACT=compact)
+        subprocess.run([sys.executable] + sys.argv, env=env, check=True)
+    sys.exit(0)
+
+from models.base import COMPACT
+from models.user import User
+
+tracemalloc.start()
+before = tracemalloc.get_traced_memory()[0]
+objs = [User(id=str(i), email="user{}@hbtn.io".format(i),
+             first_name="Bob", last_name="Dylan",
+             created_at="2024-01-01T00:00:00",
+             updated_at="2024-01-01T00:00:00")
+        for i in range(users)]
+for user in objs:
+    user.password = "pwd"
+    user.created_at
+    user.updated_at
+assert objs[0].to_json()["created_at"] == "2024-01-01T00:00:00"
+after = tracemalloc.get_traced_memory()[0]
+print("{:,} users, {}: {:.0f} bytes/user".format(
+    users, "compact" if COMPACT else "default", (after - before) / users))
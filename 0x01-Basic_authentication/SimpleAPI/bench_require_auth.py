@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+""" Benchmark of Auth.require_auth with hundreds of excluded paths,
+previous linear scan vs compiled matcher, then with a fresh short list
+on each call, as the main_*.py scripts do
+
+Usage: ./bench_require_auth.py [rules] [requests]
+"""
+import sys
+import time
+
+from api.v1.auth.auth import Auth, PathMatcher
+
+rules = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+requests = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+excluded_paths = ["/api/v1/public{}/".format(i) for i in range(rules)]
+excluded_paths += ["/api/v1/static{}/*".format(i) for i in range(rules)]
+paths = ["/api/v1/users", "/api/v1/public{}".format(rules - 1),
+         "/api/v1/static{}/app.js".format(rules - 1)]
+
+
+def linear(path, excluded_paths):
+    """ Previous require_auth """
+    path = path.rstrip('/')
+    for excluded_path in excluded_paths:
+        excluded_path = excluded_path.rstrip('/')
+        if path == excluded_path:
+            return False
+    return True
+
+
+auth = Auth()
+assert [auth.require_auth(p, excluded_paths) for p in paths] == \
+    [True, False, False]
+matcher = PathMatcher(excluded_paths)
+for name, require_auth, excluded in (
+        ("linear", linear, excluded_paths),
+        ("memoized list", auth.require_auth, excluded_paths),
+        ("prebuilt matcher", auth.require_auth, matcher)):
+    start = time.perf_counter()
+    for i in range(requests):
+        require_auth(paths[i % len(paths)], excluded)
+    elapsed = time.perf_counter() - start
+    print("{} rules, {}: {:,.0f} checks/s".format(
+        len(excluded_paths), name, requests / elapsed))
+
+for name, require_auth in (("linear", linear),
+                           ("memoized list", auth.require_auth)):
+    start = time.perf_counter()
+    for i in range(requests):
+        require_auth("/api/v1/users", ["/api/v1/status/", "/api/v1/stats"])
+    elapsed = time.perf_counter() - start
+    print("fresh 2-path list, {}: {:,.0f} checks/s".format(
+        name, requests / elapsed))
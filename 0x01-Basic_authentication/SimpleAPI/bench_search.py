@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+""" Benchmark of User.search by email, indexed vs linear scan
+
+Usage: ./bench_search.py [users]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from models.base import INDEXES
+from models.user import User
+
+users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+LOOKUPS = 100
+
+os.chdir(tempfile.mkdtemp())
+with open(".db_User.json", "w") as f:
+    json.dump({str(i): {"id": str(i), "email": "user{}@hbtn.io".format(i),
+                        "_password": None,
+                        "created_at": "2024-01-01T00:00:00",
+                        "updated_at": "2024-01-01T00:00:00"}
+               for i in range(users)}, f)
+User.load_from_file()
+os.remove(".db_User.json")
+emails = ["user{}@hbtn.io".format(i * users // LOOKUPS)
+          for i in range(LOOKUPS)]
+
+for mode in ("indexed", "scan"):
+    if mode == "scan":
+        INDEXES["User"] = {}
+    start = time.perf_counter()
+    for email in emails:
+        assert len(User.search({"email": email})) == 1
+    elapsed = time.perf_counter() - start
+    print("{:,} users, {}: {:.3f} ms/search".format(
+        users, mode, elapsed / LOOKUPS * 1000))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+""" Benchmark of the per-request authentication cost of SessionAuth vs
+BasicAuth, with and without its credential cache
+
+Usage: ./bench_session_auth.py [users] [requests]
+"""
+import base64
+import sys
+import time
+
+from api.v1.auth.basic_auth import BasicAuth
+from api.v1.auth.session_auth import SessionAuth
+from models.base import DATA
+from models.user import User
+
+users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+
+class MockRequest:
+    """ Request holding only headers and cookies """
+    def __init__(self, headers={}, cookies={}):
+        self.headers = headers
+        self.cookies = cookies
+
+
+DATA["User"] = {}
+for i in range(users):
+    user = User(email="user{}@hbtn.io".format(i))
+    user.password = "pwd{}".format(i)
+    DATA["User"][user.id] = user
+User.reindex()
+
+credentials = "user{0}@hbtn.io:pwd{0}".format(users - 1).encode()
+basic_request = MockRequest(headers={"Authorization": "Basic {}".format(
+    base64.b64encode(credentials).decode())})
+
+session_auth = SessionAuth()
+session_id = None
+for user in DATA["User"].values():
+    session_id = session_auth.create_session(user.id)
+session_request = MockRequest(cookies={"_my_session_id": session_id})
+
+for name, auth, request in (
+        ("basic, cache off", BasicAuth, basic_request),
+        ("basic, cache on", BasicAuth, basic_request),
+        ("session", session_auth, session_request)):
+    if auth is BasicAuth:
+        BasicAuth.CACHE_SIZE = 0 if name.endswith("off") else 10000
+        auth = BasicAuth()
+    start = time.perf_counter()
+    for _ in range(requests):
+        assert auth.current_user(request) is not None
+    elapsed = time.perf_counter() - start
+    print("{:,} users, {}: {:.2f} us/request".format(
+        users, name, elapsed / requests * 1e6))
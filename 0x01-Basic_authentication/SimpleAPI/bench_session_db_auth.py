@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+""" Benchmark of SessionDBAuth session validation on cache hits and
+cache misses, and of the batched purge of expired sessions
+
+Usage: ./bench_session_db_auth.py [sessions] [lookups]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from api.v1.auth.session_db_auth import SessionDBAuth
+
+sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+os.chdir(tempfile.mkdtemp())
+auth = SessionDBAuth()
+start = time.perf_counter()
+session_ids = [auth.create_session("user{}".format(i))
+               for i in range(sessions)]
+elapsed = time.perf_counter() - start
+print("{:,} sessions: {:.1f} us/create".format(
+    sessions, elapsed / sessions * 1e6))
+sample = random.Random(0).choices(session_ids, k=lookups)
+
+for mode in ("hit", "miss"):
+    SessionDBAuth.SESSION_SIZE = sessions if mode == "hit" else 0
+    auth = SessionDBAuth()
+    if mode == "hit":
+        for session_id in sample:
+            auth.user_id_for_session_id(session_id)
+    start = time.perf_counter()
+    for session_id in sample:
+        assert auth.user_id_for_session_id(session_id) is not None
+    elapsed = time.perf_counter() - start
+    print("{:,} sessions, cache {}: {:.1f} us/validation".format(
+        sessions, mode, elapsed / lookups * 1e6))
+
+auth.session_duration = -1
+for _ in range(sessions):
+    auth.create_session("expired")
+start = time.perf_counter()
+purged = auth.purge()
+elapsed = time.perf_counter() - start
+print("{:,} expired sessions purged in {:.0f} ms".format(
+    purged, elapsed * 1000))
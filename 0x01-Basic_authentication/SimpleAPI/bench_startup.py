@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+""" Benchmark of User.load_from_file() startup time, eager vs lazy
+
+Usage: ./bench_startup.py [users ...]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from models.user import User
+
+sizes = [int(n) for n in sys.argv[1:]] or [100000, 1000000]
+
+os.chdir(tempfile.mkdtemp())
+for users in sizes:
+    with open(".db_User.json", "w") as f:
+        json.dump({str(i): {"id": str(i),
+                            "email": "user{}@hbtn.io".format(i),
+                            "_password": None,
+                            "first_name": "Bob", "last_name": "Dylan",
+                            "created_at": "2024-01-01T00:00:00",
+                            "updated_at": "2024-01-01T00:00:00"}
+                   for i in range(users)}, f)
+    for lazy in (False, True):
+        User.LAZY = lazy
+        start = time.perf_counter()
+        User.load_from_file()
+        elapsed = time.perf_counter() - start
+        assert User.get(str(users - 1)).email == \
+            "user{}@hbtn.io".format(users - 1)
+        print("{:,} users, {}: {:.2f} s".format(
+            users, "lazy" if lazy else "eager", elapsed))
+    os.remove(".db_User.json")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+""" Benchmark of the JSON file store vs the SQLite store of User:
+startup, get, search by email, page, count and save
+
+Usage: ./bench_storage.py [users ...]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from models import sqlite_store
+from models.user import User
+
+sizes = [int(n) for n in sys.argv[1:]] or [10000, 1000000]
+LOOKUPS = 1000
+SAVES = 5
+
+
+def timed(label, count, func):
+    """ Print the mean time of count calls of func(i) """
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print("  {}: {:.3f} ms".format(label, elapsed / count * 1000))
+
+
+def save(i):
+    """ Update one user """
+    user = User.get(str(i * 7919 % users))
+    user.first_name = "Bob"
+    user.save()
+
+
+os.chdir(tempfile.mkdtemp())
+for users in sizes:
+    with open(".db_User.json", "w") as f:
+        json.dump({str(i): {"id": str(i),
+                            "email": "user{}@hbtn.io".format(i),
+                            "_password": None,
+                            "created_at": "2024-01-01T00:00:00",
+                            "updated_at": "2024-01-01T00:00:00"}
+                   for i in range(users)}, f)
+    for engine in ("json", "sqlite"):
+        User.SQLITE = engine == "sqlite"
+        sqlite_store.STORES.clear()
+        if os.path.exists(sqlite_store.SQLITE_PATH):
+            os.remove(sqlite_store.SQLITE_PATH)
+        print("{:,} users, {}:".format(users, engine))
+        if User.SQLITE:
+            timed("import of the JSON file", 1,
+                  lambda i: User.load_from_file())
+            sqlite_store.STORES.clear()
+        timed("startup", 1, lambda i: User.load_from_file())
+        timed("get", LOOKUPS,
+              lambda i: User.get(str(i * 7919 % users)))
+        timed("search by email", LOOKUPS,
+              lambda i: User.search(
+                  {"email": "user{}@hbtn.io".format(i * 7919 % users)}))
+        timed("page of 100", LOOKUPS,
+              lambda i: User.page(100, str(i * 7919 % users)))
+        timed("count", LOOKUPS, lambda i: User.count())
+        timed("save", SAVES, save)
+    os.remove(".db_User.json")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+""" Benchmark of the GET /api/v1/users body: to_json() + json.dumps of
+the whole list vs cached per-user fragments
+
+Usage: ./bench_users_json.py [users ...]
+"""
+import json
+import sys
+import time
+
+from models.base import DATA, FRAGMENTS, orjson
+from models.user import User
+
+sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000]
+print("encoder: {}".format("orjson" if orjson else "json"))
+
+
+def full():
+    """ Previous view: list of to_json() encoded at once """
+    return json.dumps([user.to_json() for user in User.all()],
+                      sort_keys=True, separators=(",", ":")) + "\n"
+
+
+def fragments():
+    """ Current view: cached fragments joined """
+    all_users = ",".join(user.json_fragment() for user in User.all())
+    return "[{}]\n".format(all_users)
+
+
+for users in sizes:
+    DATA["User"] = {}
+    FRAGMENTS["User"] = {}
+    for i in range(users):
+        user = User(email="user{}@hbtn.io".format(i), first_name="Bob")
+        DATA["User"][user.id] = user
+    assert json.loads(full()) == json.loads(fragments())
+    for name, build in (("to_json", full), ("fragments", fragments)):
+        start = time.perf_counter()
+        build()
+        elapsed = time.perf_counter() - start
+        print("{:,} users, {}: {:.1f} ms".format(
+            users, name, elapsed * 1000))
@@ -1,21 +1,289 @@
 #!/usr/bin/env python3
 """ Base module
 """
-from datetime import datetime
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import TypeVar, List, Iterable
-from os import path
+from os import getenv, path
+import atexit
+import itertools
 import json
+import os
+import re
+import sys
+import threading
 import uuid
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from models.sqlite_store import get_store
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+EPOCH = datetime(1970, 1, 1)
+COMPACT = getenv("BASE_COMPACT") == "1"
 DATA = {}
+INDEXES = {}
+INDEXED_VALUES = {}
+JOURNAL_SIZES = {}
+DIRTY = set()
+DIRTY_LOCK = threading.Lock()
+BATCH = threading.local()
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+FRAGMENTS = {}
+VERSIONS = {}
+VERSION_COUNTER = itertools.count(1)
+ORDERED_IDS = {}
+WRITE_LOCKS = {}
+
+
+def write_lock(s_class: str) -> threading.RLock:
+    """ Return the lock serializing the writes of a class
+    """
+    lock = WRITE_LOCKS.get(s_class)
+    if lock is None:
+        lock = WRITE_LOCKS.setdefault(s_class, threading.RLock())
+    return lock
+
+
+def json_dumps(obj) -> str:
+    """ Encode obj like Flask's jsonify (sorted keys, compact), with
+    orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode()
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"))
+
+
+class LazyTimestamp():
+    """ Datetime attribute kept as its TIMESTAMP_FORMAT string until read
+    """
+
+    def __set_name__(self, owner: type, name: str):
+        """ Remember the attribute name
+        """
+        self.name = name
+
+    def __get__(self, obj, objtype: type = None) -> datetime:
+        """ Parse the stored string on first access
+        """
+        if obj is None:
+            return self
+        try:
+            value = obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name)
+        if type(value) is str:
+            value = datetime.strptime(value, TIMESTAMP_FORMAT)
+            obj.__dict__[self.name] = value
+        return value
+
+    def __set__(self, obj, value):
+        """ Store a datetime or a TIMESTAMP_FORMAT string
+        """
+        obj.__dict__[self.name] = value
+
+
+class CompactTimestamp():
+    """ Datetime attribute stored in the slot "_<name>" as whole seconds
+    since the epoch
+    """
+
+    def __set_name__(self, owner: type, name: str):
+        """ Remember the attribute and slot names
+        """
+        self.name = name
+        self.slot = "_{}".format(name)
+
+    def __get__(self, obj, objtype: type = None) -> datetime:
+        """ Convert the stored seconds back to a datetime
+        """
+        if obj is None:
+            return self
+        return EPOCH + timedelta(seconds=getattr(obj, self.slot))
+
+    def __set__(self, obj, value):
+        """ Store a datetime or a TIMESTAMP_FORMAT string as seconds
+        """
+        if type(value) is str:
+            value = datetime.strptime(value, TIMESTAMP_FORMAT)
+        setattr(obj, self.slot, (value - EPOCH) // timedelta(seconds=1))
+
+
+def intern(value):
+    """ Intern strings in the compact layout, to share repeated values
+    """
+    if COMPACT and type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+@lru_cache(maxsize=None)
+def slot_fields(cls: type) -> tuple:
+    """ Return the attributes stored in the slots of cls, timestamps under
+    their public name
+    """
+    fields = []
+    for klass in reversed(cls.__mro__):
+        for slot in klass.__dict__.get("__slots__", ()):
+            if isinstance(getattr(cls, slot[1:], None), CompactTimestamp):
+                slot = slot[1:]
+            fields.append(slot)
+    return tuple(fields)
+
+
+class LazyObjects(dict):
+    """ Objects of a class by ID, stored as their serialized dictionary
+    until first accessed
+    """
+
+    def __init__(self, cls: type):
+        """ Initialize an empty store for cls
+        """
+        super().__init__()
+        self.cls = cls
+
+    def peek(self, key: str):
+        """ Return the object or its dictionary, without building it
+        """
+        return dict.__getitem__(self, key)
+
+    def _build(self, key: str, value) -> TypeVar('Base'):
+        """ Build and keep the object for a stored dictionary, unless a
+        concurrent write replaced or removed it meanwhile
+        """
+        if type(value) is not dict:
+            return value
+        with write_lock(self.cls.__name__):
+            current = dict.get(self, key)
+            if type(current) is dict:
+                current = self.cls(**current)
+                dict.__setitem__(self, key, current)
+        return current if current is not None else self.cls(**value)
+
+    def __getitem__(self, key: str) -> TypeVar('Base'):
+        """ Return one object by ID
+        """
+        return self._build(key, dict.__getitem__(self, key))
+
+    def get(self, key: str, default=None) -> TypeVar('Base'):
+        """ Return one object by ID, or default
+        """
+        value = dict.get(self, key)
+        if value is None:
+            return default
+        return self._build(key, value)
+
+    def values(self) -> List[TypeVar('Base')]:
+        """ Return all objects
+        """
+        return [self._build(k, v) for k, v in list(dict.items(self))]
+
+    def items(self) -> List[tuple]:
+        """ Return all (ID, object) pairs
+        """
+        return [(k, self._build(k, v)) for k, v in list(dict.items(self))]
+
+
+def iter_json_object(f, chunk_size: int = 1 << 16) -> Iterable[tuple]:
+    """ Yield the (key, value) pairs of the JSON object in file f, reading
+    and decoding it chunk by chunk
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    started, first = False, True
+    while True:
+        try:
+            pos = JSON_WHITESPACE.match(buf, pos).end()
+            if not started:
+                if buf[pos] != "{":
+                    raise ValueError("Expected a JSON object")
+                pos, started = pos + 1, True
+                continue
+            if buf[pos] == "}":
+                return
+            end = pos
+            if not first:
+                if buf[pos] != ",":
+                    raise ValueError("Expected ',' at {}".format(pos))
+                end = JSON_WHITESPACE.match(buf, pos + 1).end()
+            key, end = decoder.raw_decode(buf, end)
+            end = JSON_WHITESPACE.match(buf, end).end()
+            if buf[end] != ":":
+                raise ValueError("Expected ':' at {}".format(end))
+            end = JSON_WHITESPACE.match(buf, end + 1).end()
+            value, end = decoder.raw_decode(buf, end)
+            if not eof:
+                # A value cut by the end of the buffer may decode to a
+                # prefix of itself, such as 1. of 1.5, so it is only
+                # taken once the ',' or '}' after it has been read
+                after = JSON_WHITESPACE.match(buf, end).end()
+                if buf[after] not in ",}":
+                    raise IndexError(after)
+        except (IndexError, json.JSONDecodeError):
+            if eof:
+                raise ValueError("Truncated JSON object")
+            chunk = f.read(chunk_size)
+            buf, pos, eof = buf[pos:] + chunk, 0, chunk == ""
+            continue
+        pos, first = end, False
+        yield key, value
 
 
 class Base():
     """ Base class
+
+    Subclasses list in INDEXED the attributes to keep secondary indexes
+    on. Indexes map an attribute value to the IDs of the objects holding
+    it, and reflect each object as of its last save().
+
+    With LAZY set, load_from_file() decodes the file incrementally and
+    keeps each object as its dictionary until it is first accessed.
+    Timestamps are always parsed on first access.
+
+    With JOURNAL set, save() and remove() append one line to the class
+    journal instead of rewriting the whole file, and the journal is
+    compacted into the file every JOURNAL_LIMIT entries.
+
+    Writes of a class (save, remove, loading and writing its file) are
+    serialized by its write_lock(), while reads take no lock: get() and
+    count() are single dictionary operations, and search(), page() and
+    all() work on a snapshot of the objects or IDs taken in one step.
+
+    With SQLITE set, objects are not kept in memory: each class is a
+    table of models.sqlite_store, which get(), search(), page(), count(),
+    save() and remove() query directly. load_from_file() imports the
+    JSON file into an empty table once, and save_to_file() does nothing.
+
+    Otherwise, inside batch() or while the background flusher runs,
+    save() and remove() only mark their class dirty, and each dirty
+    class is written once by flush(). batch() only defers the writes of
+    the thread running it.
+
+    With BASE_COMPACT=1 in the environment at import, instances use the
+    compact layout: attributes live in __slots__ declared by each
+    subclass, timestamps are stored as integer seconds, and subclasses
+    intern() their repeated strings.
     """
 
+    INDEXED = ()
+    LAZY = False
+    JOURNAL = False
+    JOURNAL_LIMIT = 1000
+    SQLITE = False
+    _flusher = None
+    if COMPACT:
+        __slots__ = ("id", "_created_at", "_updated_at")
+        created_at = CompactTimestamp()
+        updated_at = CompactTimestamp()
+    else:
+        created_at = LazyTimestamp()
+        updated_at = LazyTimestamp()
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
@@ -25,13 +293,11 @@ class Base():
 
         self.id = kwargs.get('id', str(uuid.uuid4()))
         if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
+            self.created_at = kwargs.get('created_at')
         else:
             self.created_at = datetime.utcnow()
         if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+            self.updated_at = kwargs.get('updated_at')
         else:
             self.updated_at = datetime.utcnow()
 
@@ -48,7 +314,15 @@ class Base():
         """ Convert the object a JSON dictionary
         """
         result = {}
-        for key, value in self.__dict__.items():
+        fields = []
+        for key in slot_fields(self.__class__):
+            try:
+                fields.append((key, getattr(self, key)))
+            except AttributeError:
+                continue
+        if hasattr(self, "__dict__"):
+            fields.extend(self.__dict__.items())
+        for key, value in fields:
             if not for_serialization and key[0] == '_':
                 continue
             if type(value) is datetime:
@@ -57,57 +331,339 @@ class Base():
                 result[key] = value
         return result
 
+    def json_fragment(self) -> str:
+        """ Return to_json() encoded with json_dumps, cached until the
+        next save() or remove() of current object
+
+        The cached fragment is tagged with the version of the object it
+        was encoded from, so one encoded concurrently with a save() is
+        never served after it.
+        """
+        s_class = self.__class__.__name__
+        if self.__class__.SQLITE:
+            return json_dumps(self.to_json())
+        fragments = FRAGMENTS.setdefault(s_class, {})
+        version = VERSIONS.get(s_class, {}).get(self.id, 0)
+        cached = fragments.get(self.id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        fragment = json_dumps(self.to_json())
+        fragments[self.id] = (version, fragment)
+        return fragment
+
     @classmethod
     def load_from_file(cls):
-        """ Load all objects from file
+        """ Load all objects from file, then replay the journal
         """
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
+        if cls.SQLITE:
+            store = get_store(cls)
+            if store.empty() and path.exists(file_path):
+                with open(file_path, 'r') as f:
+                    store.import_objects(
+                        obj_json for _, obj_json in iter_json_object(f))
             return
+        with write_lock(s_class):
+            objs = LazyObjects(cls) if cls.LAZY else {}
+            if path.exists(file_path):
+                with open(file_path, 'r') as f:
+                    if cls.LAZY:
+                        for obj_id, obj_json in iter_json_object(f):
+                            objs[obj_id] = obj_json
+                    else:
+                        objs_json = json.load(f)
+                        for obj_id, obj_json in objs_json.items():
+                            objs[obj_id] = cls(**obj_json)
+            DATA[s_class] = objs
+            FRAGMENTS[s_class] = {}
+            VERSIONS[s_class] = {}
+            ORDERED_IDS.pop(s_class, None)
+            torn = cls._replay_journal()
+            cls.reindex()
+            if torn:
+                cls.save_to_file()
+
+    @classmethod
+    def _replay_journal(cls) -> bool:
+        """ Apply the journal entries on top of the loaded objects
+
+        Return True if the journal ends with a partial entry, left by a
+        crash during an append, which must not be appended after.
+        """
+        s_class = cls.__name__
+        journal_path = ".db_{}.journal".format(s_class)
+        JOURNAL_SIZES[s_class] = 0
+        if not path.exists(journal_path):
+            return False
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+        with open(journal_path, 'r') as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    return True
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    return True
+                if entry["op"] == "save" and cls.LAZY:
+                    DATA[s_class][entry["id"]] = entry["obj"]
+                elif entry["op"] == "save":
+                    DATA[s_class][entry["id"]] = cls(**entry["obj"])
+                else:
+                    DATA[s_class].pop(entry["id"], None)
+                JOURNAL_SIZES[s_class] += 1
+        return False
+
+    @classmethod
+    def reindex(cls):
+        """ Rebuild the secondary indexes from all objects, without
+        building the ones not loaded yet
+        """
+        s_class = cls.__name__
+        with write_lock(s_class):
+            INDEXES[s_class] = {}
+            INDEXED_VALUES[s_class] = {}
+            for obj_id, obj in list(dict.items(DATA[s_class])):
+                if type(obj) is dict:
+                    values = {attr: obj.get(attr) for attr in cls.INDEXED}
+                else:
+                    values = {attr: getattr(obj, attr, None)
+                              for attr in cls.INDEXED}
+                cls._index_values(obj_id, values)
+
+    def _index(self):
+        """ Add or refresh current object in the secondary indexes
+        """
+        self.__class__._index_values(
+            self.id, {attr: getattr(self, attr, None)
+                      for attr in self.INDEXED})
+
+    @classmethod
+    def _index_values(cls, obj_id: str, values: dict):
+        """ Index one object ID under its current indexed values
+        """
+        s_class = cls.__name__
+        indexes = INDEXES.setdefault(s_class, {})
+        indexed = INDEXED_VALUES.setdefault(s_class, {})
+        old_values = indexed.get(obj_id, {})
+        for attr, value in values.items():
+            index = indexes.setdefault(attr, {})
+            if attr in old_values and old_values[attr] != value:
+                cls._unindex_value(index, old_values[attr], obj_id)
+            index.setdefault(value, {})[obj_id] = True
+        indexed[obj_id] = values
+
+    def _unindex(self):
+        """ Remove current object from the secondary indexes
+        """
+        s_class = self.__class__.__name__
+        indexes = INDEXES.get(s_class, {})
+        old_values = INDEXED_VALUES.get(s_class, {}).pop(self.id, {})
+        for attr, value in old_values.items():
+            self._unindex_value(indexes[attr], value, self.id)
+
+    @staticmethod
+    def _unindex_value(index: dict, value, obj_id: str):
+        """ Remove one object ID from the bucket of one index value
+        """
+        bucket = index.get(value)
+        if bucket is not None:
+            bucket.pop(obj_id, None)
+            if len(bucket) == 0:
+                del index[value]
 
     @classmethod
     def save_to_file(cls):
-        """ Save all objects to file
+        """ Save all objects to file and drop the journal it supersedes
         """
+        if cls.SQLITE:
+            return
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        journal_path = ".db_{}.journal".format(s_class)
+        with write_lock(s_class):
+            objs_json = {}
+            for obj_id, obj in list(dict.items(DATA[s_class])):
+                if type(obj) is dict:
+                    objs_json[obj_id] = obj
+                else:
+                    objs_json[obj_id] = obj.to_json(True)
+
+            tmp_path = "{}.{}.tmp".format(file_path, threading.get_ident())
+            with open(tmp_path, 'w') as f:
+                json.dump(objs_json, f)
+                if cls.JOURNAL:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+            if path.exists(journal_path):
+                os.remove(journal_path)
+            JOURNAL_SIZES[s_class] = 0
+
+    @classmethod
+    def _append_to_journal(cls, entry: dict):
+        """ Durably append one entry to the journal, compacting it into
+        the file once it holds JOURNAL_LIMIT entries
+        """
+        s_class = cls.__name__
+        journal_path = ".db_{}.journal".format(s_class)
+        with open(journal_path, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        JOURNAL_SIZES[s_class] = JOURNAL_SIZES.get(s_class, 0) + 1
+        if JOURNAL_SIZES[s_class] >= cls.JOURNAL_LIMIT:
+            cls.save_to_file()
+
+    def _persist(self, op: str):
+        """ Record a "save" or "remove" of current object: in the journal,
+        as a dirty class to flush later, or by rewriting the file
+        """
+        cls = self.__class__
+        if cls.JOURNAL:
+            entry = {"op": op, "id": self.id}
+            if op == "save":
+                entry["obj"] = self.to_json(True)
+            cls._append_to_journal(entry)
+        elif getattr(BATCH, "depth", 0) > 0 or Base._flusher is not None:
+            with DIRTY_LOCK:
+                DIRTY.add(cls)
+        else:
+            cls.save_to_file()
+
+    @classmethod
+    @contextmanager
+    def batch(cls):
+        """ Defer the file writes of the block, then write each class it
+        changed once
+        """
+        BATCH.depth = getattr(BATCH, "depth", 0) + 1
+        try:
+            yield
+        finally:
+            BATCH.depth -= 1
+            if BATCH.depth == 0:
+                Base.flush()
+
+    @staticmethod
+    def flush():
+        """ Write every dirty class to its file
+        """
+        with DIRTY_LOCK:
+            dirty = list(DIRTY)
+            DIRTY.clear()
+        for klass in dirty:
+            klass.save_to_file()
+
+    @staticmethod
+    def start_flusher(interval: float):
+        """ Start a background thread flushing dirty classes at most once
+        per interval seconds, and once more at exit
+        """
+        if Base._flusher is not None:
+            return
+        stop = threading.Event()
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+        def run():
+            while not stop.wait(interval):
+                Base.flush()
+
+        thread = threading.Thread(target=run, daemon=True)
+        Base._flusher = (thread, stop)
+        thread.start()
+        atexit.register(Base.stop_flusher)
+
+    @staticmethod
+    def stop_flusher():
+        """ Stop the background flusher and write what is left
+        """
+        if Base._flusher is None:
+            return
+        thread, stop = Base._flusher
+        Base._flusher = None
+        stop.set()
+        thread.join()
+        Base.flush()
 
     def save(self):
         """ Save current object
         """
         s_class = self.__class__.__name__
-        self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        if self.__class__.SQLITE:
+            self.updated_at = datetime.utcnow()
+            get_store(self.__class__).save(self)
+            return
+        with write_lock(s_class):
+            self.updated_at = datetime.utcnow()
+            ordered_ids = ORDERED_IDS.get(s_class)
+            if ordered_ids is not None and self.id not in DATA[s_class]:
+                insort(ordered_ids, self.id)
+            DATA[s_class][self.id] = self
+            self._bump_version()
+            self._index()
+            self._persist("save")
 
     def remove(self):
         """ Remove object
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
+        if self.__class__.SQLITE:
+            get_store(self.__class__).remove(self.id)
+            return
+        with write_lock(s_class):
+            if DATA[s_class].get(self.id) is None:
+                return
             del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+            ordered_ids = ORDERED_IDS.get(s_class)
+            if ordered_ids is not None:
+                del ordered_ids[bisect_left(ordered_ids, self.id)]
+            VERSIONS.get(s_class, {}).pop(self.id, None)
+            FRAGMENTS.get(s_class, {}).pop(self.id, None)
+            self._unindex()
+            self._persist("remove")
+
+    def _bump_version(self):
+        """ Mark the cached JSON fragment of current object as outdated
+
+        Versions come from one process-wide counter, so an object saved
+        again after remove() dropped its version never reuses one.
+        """
+        versions = VERSIONS.setdefault(self.__class__.__name__, {})
+        versions[self.id] = next(VERSION_COUNTER)
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
+        if cls.SQLITE:
+            return get_store(cls).count()
         s_class = cls.__name__
         return len(DATA[s_class].keys())
 
+    @classmethod
+    def page(cls, limit: int, after: str = None) -> List[TypeVar('Base')]:
+        """ Return at most limit objects in ID order, starting after the
+        ID after
+
+        The sorted IDs are built on first use and then kept up to date
+        by save() and remove().
+        """
+        if cls.SQLITE:
+            return get_store(cls).page(limit, after)
+        s_class = cls.__name__
+        ordered_ids = ORDERED_IDS.get(s_class)
+        if ordered_ids is None:
+            with write_lock(s_class):
+                ordered_ids = ORDERED_IDS.get(s_class)
+                if ordered_ids is None:
+                    ordered_ids = sorted(DATA[s_class].keys())
+                    ORDERED_IDS[s_class] = ordered_ids
+        start = 0 if after is None else bisect_right(ordered_ids, after)
+        objs = DATA[s_class]
+        page = (objs.get(obj_id)
+                for obj_id in ordered_ids[start:start + limit])
+        return [obj for obj in page if obj is not None]
+
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
         """ Return all objects
@@ -118,12 +674,17 @@ class Base():
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
+        if cls.SQLITE:
+            return get_store(cls).get(id)
         s_class = cls.__name__
         return DATA[s_class].get(id)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
+
+        Uses the index of the first indexed attribute of the query to
+        narrow the candidates, and scans all objects otherwise.
         """
         s_class = cls.__name__
         def _search(obj):
@@ -133,5 +694,17 @@ class Base():
                 if (getattr(obj, k) != v):
                     return False
             return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+
+        if cls.SQLITE:
+            return list(filter(_search, get_store(cls).candidates(attributes)))
+        objs = DATA[s_class]
+        indexes = INDEXES.get(s_class, {})
+        for k, v in attributes.items():
+            if k in cls.INDEXED and k in indexes:
+                candidates = [objs.get(obj_id)
+                              for obj_id in list(indexes[k].get(v, {}))]
+                candidates = [obj for obj in candidates if obj is not None]
+                break
+        else:
+            candidates = list(objs.values())
+        return list(filter(_search, candidates))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+""" SQLite storage module
+"""
+from typing import Iterable, List, TypeVar
+import json
+import sqlite3
+import threading
+
+
+SQLITE_PATH = ".db.sqlite3"
+STATEMENT_CACHE_SIZE = 64
+STORES = {}
+STORES_LOCK = threading.Lock()
+CONNECTIONS = threading.local()
+
+
+def connect(db_path: str = SQLITE_PATH) -> sqlite3.Connection:
+    """ Return the connection of the current thread to the database at
+    db_path, opening it on first use
+    """
+    connections = getattr(CONNECTIONS, "by_path", None)
+    if connections is None:
+        connections = CONNECTIONS.by_path = {}
+    db = connections.get(db_path)
+    if db is None:
+        db = sqlite3.connect(db_path, isolation_level=None,
+                             cached_statements=STATEMENT_CACHE_SIZE)
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA busy_timeout=5000")
+        connections[db_path] = db
+    return db
+
+
+class SQLiteStore():
+    """ Objects of a class stored as rows of a SQLite table
+
+    Each row keeps the object ID as primary key, one indexed column per
+    attribute listed in the class INDEXED, and the whole object as JSON
+    in the data column. The database runs in WAL mode, so readers are
+    not blocked by the single writer, and each thread has its own
+    connection.
+
+    All statements are built once per store with ? placeholders, so the
+    sqlite3 statement cache of each connection prepares them only once.
+    """
+
+    def __init__(self, cls: type, db_path: str = SQLITE_PATH):
+        """ Initialize the store of cls in the database at db_path
+        """
+        self.cls = cls
+        self.db_path = db_path
+        table = '"{}"'.format(cls.__name__)
+        columns = ['"{}"'.format(attr) for attr in cls.INDEXED]
+        self.sql_get = "SELECT data FROM {} WHERE id = ?".format(table)
+        self.sql_count = "SELECT COUNT(*) FROM {}".format(table)
+        self.sql_any = "SELECT 1 FROM {} LIMIT 1".format(table)
+        self.sql_all = "SELECT data FROM {} ORDER BY id".format(table)
+        self.sql_page = ("SELECT data FROM {} WHERE id > ? ORDER BY id "
+                         "LIMIT ?").format(table)
+        self.sql_save = ("INSERT OR REPLACE INTO {} (id, {}data) "
+                         "VALUES (?, {}?)").format(
+            table, "".join(c + ", " for c in columns),
+            "?, " * len(columns))
+        self.sql_remove = "DELETE FROM {} WHERE id = ?".format(table)
+        self.sql_search = {
+            attr: "SELECT data FROM {} WHERE {} IS ?".format(table, column)
+            for attr, column in zip(cls.INDEXED, columns)}
+
+        db = self.connection()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS {} (id TEXT PRIMARY KEY, "
+                   "{}data TEXT NOT NULL)".format(
+                       table, "".join(c + ", " for c in columns)))
+        for attr, column in zip(cls.INDEXED, columns):
+            db.execute('CREATE INDEX IF NOT EXISTS "{}_{}" ON {} ({})'.format(
+                cls.__name__, attr, table, column))
+
+    def connection(self) -> sqlite3.Connection:
+        """ Return the connection of the current thread
+        """
+        return connect(self.db_path)
+
+    def _row(self, obj_json: dict) -> tuple:
+        """ Return the parameters of sql_save for a serialized object
+        """
+        values = [obj_json.get(attr) for attr in self.cls.INDEXED]
+        return (obj_json["id"], *values,
+                json.dumps(obj_json, separators=(",", ":")))
+
+    def _build(self, rows: Iterable[tuple]) -> List[TypeVar('Base')]:
+        """ Return the objects of rows of data
+        """
+        return [self.cls(**json.loads(row[0])) for row in rows]
+
+    def get(self, obj_id: str) -> TypeVar('Base'):
+        """ Return one object by ID, or None
+        """
+        row = self.connection().execute(self.sql_get, (obj_id,)).fetchone()
+        return None if row is None else self.cls(**json.loads(row[0]))
+
+    def count(self) -> int:
+        """ Count all objects
+        """
+        return self.connection().execute(self.sql_count).fetchone()[0]
+
+    def empty(self) -> bool:
+        """ Return True if the table has no rows
+        """
+        return self.connection().execute(self.sql_any).fetchone() is None
+
+    def page(self, limit: int, after: str = None) -> List[TypeVar('Base')]:
+        """ Return at most limit objects in ID order, starting after the
+        ID after
+        """
+        rows = self.connection().execute(
+            self.sql_page, ("" if after is None else after, limit))
+        return self._build(rows)
+
+    def candidates(self, attributes: dict) -> List[TypeVar('Base')]:
+        """ Return the objects matching the first indexed attribute of
+        attributes, or all objects
+        """
+        db = self.connection()
+        for k, v in attributes.items():
+            if k in self.sql_search:
+                return self._build(db.execute(self.sql_search[k], (v,)))
+        return self._build(db.execute(self.sql_all))
+
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or replace the row of obj
+        """
+        self.connection().execute(self.sql_save,
+                                  self._row(obj.to_json(True)))
+
+    def remove(self, obj_id: str):
+        """ Delete the row of an ID
+        """
+        self.connection().execute(self.sql_remove, (obj_id,))
+
+    def import_objects(self, objs_json: Iterable[dict]) -> int:
+        """ Insert serialized objects in one transaction, and return how
+        many were inserted
+        """
+        db = self.connection()
+        db.execute("BEGIN")
+        try:
+            cursor = db.executemany(self.sql_save, map(self._row, objs_json))
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        return cursor.rowcount
+
+
+def get_store(cls: type) -> SQLiteStore:
+    """ Return the store of a class, creating its table on first use
+    """
+    store = STORES.get(cls.__name__)
+    if store is None:
+        with STORES_LOCK:
+            store = STORES.get(cls.__name__)
+            if store is None:
+                store = SQLiteStore(cls)
+                STORES[cls.__name__] = store
+    return store
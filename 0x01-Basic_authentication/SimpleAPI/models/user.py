@@ -2,21 +2,25 @@
 """ User module
 """
 import hashlib
-from models.base import Base
+from models.base import Base, COMPACT, intern
 
 
 class User(Base):
     """ User class
     """
 
+    INDEXED = ("email",)
+    if COMPACT:
+        __slots__ = ("email", "_password", "first_name", "last_name")
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
         """
         super().__init__(*args, **kwargs)
         self.email = kwargs.get('email')
         self._password = kwargs.get('_password')
-        self.first_name = kwargs.get('first_name')
-        self.last_name = kwargs.get('last_name')
+        self.first_name = intern(kwargs.get('first_name'))
+        self.last_name = intern(kwargs.get('last_name'))
 
     @property
     def password(self) -> str:
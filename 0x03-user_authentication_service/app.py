@@ -3,8 +3,9 @@
 Flask app to handle user registration with Auth
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, abort, redirect
 from auth import Auth
+from hashing import HashingOverloaded, get_hashing_service
 
 # Create an instance of the Auth class
 AUTH = Auth()
@@ -13,6 +14,35 @@ AUTH = Auth()
 app = Flask(__name__)
 
 
+@app.teardown_appcontext
+def close_session(exception=None):
+    """Releases the database session of the request thread."""
+    AUTH.close_session()
+
+
+@app.errorhandler(HashingOverloaded)
+def hashing_overloaded(error):
+    """
+    Responds with 503 when the password hashing queue is full, so the
+    client retries later instead of waiting on an overloaded pool.
+    """
+    response = jsonify({"message": "service overloaded, retry later"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+@app.route("/metrics/hashing", methods=["GET"])
+def hashing_metrics():
+    """
+    GET /metrics/hashing route reporting the bcrypt cost calibration and
+    how many successful logins had their password rehashed.
+
+    Returns:
+        JSON response with the hashing service counters.
+    """
+    return jsonify(get_hashing_service().stats()), 200
+
+
 @app.route("/users", methods=["POST"])
 def users():
     """
@@ -4,28 +4,27 @@ Authentication module for user service
 """
 
 import uuid
-import bcrypt
 from user import User
 from db import DB
 from sqlalchemy.orm.exc import NoResultFound
-from bcrypt import hashpw, gensalt
 from typing import Optional
+from hashing import HashingOverloaded, get_hashing_service
 
 
 def _hash_password(password: str) -> bytes:
     """
-    Hashes a password using bcrypt.hashpw.
+    Hashes a password using bcrypt.hashpw, in the hashing service pool.
 
     Args:
         password (str): The password to be hashed.
 
     Returns:
         bytes: The hashed password as bytes.
+
+    Raises:
+        HashingOverloaded: If the hashing queue is full.
     """
-    # Generate a salt and hash the password
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed_password
+    return get_hashing_service().hash_password(password)
 
 
 class Auth:
@@ -49,6 +48,7 @@ class Auth:
 
         Raises:
             ValueError: If a user with the given email already exists.
+            HashingOverloaded: If the hashing queue is full.
         """
         try:
             # Try to find an existing user by email
@@ -62,7 +62,8 @@ class Auth:
 
     def valid_login(self, email: str, password: str) -> bool:
         """
-        Validate if the login credentials are correct.
+        Validate if the login credentials are correct, and rehash the
+        password at the current cost if its hash is cheaper.
 
         Args:
             email (str): The email of the user.
@@ -70,18 +71,41 @@ class Auth:
 
         Returns:
             bool: True if login is valid, False otherwise.
+
+        Raises:
+            HashingOverloaded: If the hashing queue is full.
         """
+        hasher = get_hashing_service()
         try:
             # Find the user by email
             user = self._db.find_user_by(email=email)
 
             # Check if the provided password matches the stored password
-            if bcrypt.checkpw(password.encode('utf-8'), user.hashed_password):
-                return True
+            if not hasher.check_password(password, user.hashed_password):
+                return False
+        except HashingOverloaded:
+            raise
         except Exception:
+            return False
+
+        # Replace a hash cheaper than the current cost while the password
+        # is at hand; if the pool is busy, even for the calibration of
+        # needs_rehash(), the next login will do it. The hash is only
+        # replaced if it is still the one just checked, so a concurrent
+        # update_password() wins
+        checked = user.hashed_password
+        try:
+            if hasher.needs_rehash(checked) and self._db.update_user_if(
+                    user.id, {"hashed_password": checked},
+                    hashed_password=_hash_password(password)):
+                hasher.record_rehash()
+        except HashingOverloaded:
             pass
+        return True
 
-        return False
+    def close_session(self) -> None:
+        """Releases the database session of the calling thread."""
+        self._db.remove_session()
 
     def _generate_uuid(self) -> str:
         """
@@ -205,6 +229,7 @@ class Auth:
 
         Raises:
             ValueError: If the reset token is invalid or the user is not found.
+            HashingOverloaded: If the hashing queue is full.
         """
         # Step 1: Find user by reset_token
         user: Optional[User] = self._db.find_user_by(reset_token=reset_token)
@@ -214,8 +239,7 @@ class Auth:
             raise ValueError("Invalid reset token")
 
         # Step 3: Hash the new password
-        hashed_password = bcrypt.hashpw(
-            password.encode('utf-8'), bcrypt.gensalt())
+        hashed_password = _hash_password(password)
 
         # Step 4: Update user's password and reset_token
         self._db.update_user(
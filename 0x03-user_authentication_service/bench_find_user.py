@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark of DB.find_user_by on email, session_id and reset_token, on a
+users table without indexes, then after migrate() created them
+
+Usage: ./bench_find_user.py [users] [lookups]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from db import DB, migrate
+from user import User
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+LOOKUPS = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+CHUNK_SIZE = 10000
+
+os.chdir(tempfile.mkdtemp())
+db = DB()
+engine = db._engine
+for index in User.__table__.indexes:
+    index.drop(engine)
+
+start = time.perf_counter()
+with engine.begin() as connection:
+    for first in range(0, USERS, CHUNK_SIZE):
+        connection.execute(User.__table__.insert(), [
+            {"email": "user{}@hbtn.io".format(i), "hashed_password": "x",
+             "session_id": "session{}".format(i),
+             "reset_token": "token{}".format(i)}
+            for i in range(first, min(first + CHUNK_SIZE, USERS))])
+print("{:,} users inserted in {:.1f} s".format(
+    USERS, time.perf_counter() - start))
+
+
+def bench(label: str) -> None:
+    """Prints the mean find_user_by latency for each looked up column."""
+    for column, value in (("email", "user{}@hbtn.io"),
+                          ("session_id", "session{}"),
+                          ("reset_token", "token{}")):
+        start = time.perf_counter()
+        for n in range(LOOKUPS):
+            i = n * 7919 % USERS
+            user = db.find_user_by(**{column: value.format(i)})
+            assert user.email == "user{}@hbtn.io".format(i)
+        elapsed = time.perf_counter() - start
+        print("{:,} users, {}, {}: {:.3f} ms/lookup".format(
+            USERS, label, column, elapsed / LOOKUPS * 1000))
+
+
+bench("no index")
+start = time.perf_counter()
+created = migrate(engine)
+print("migrate() created {} in {:.1f} s".format(
+    ", ".join(created), time.perf_counter() - start))
+bench("indexed")
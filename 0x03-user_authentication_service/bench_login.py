@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Load benchmark of concurrent POST /sessions logins, with bcrypt inline
+on the request threads vs in the hashing service pool, and of the
+GET /profile latency of a client sharing the server with them
+
+Usage: ./bench_login.py [threads] [seconds]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.chdir(tempfile.mkdtemp())
+
+import hashing  # noqa: E402
+from app import AUTH, app  # noqa: E402
+
+THREADS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+USERS = 16
+
+
+def worker(i: int, stop: threading.Event, results: list) -> None:
+    """Logs in as one user until stop, recording latency and status."""
+    client = app.test_client()
+    email = "user{}@hbtn.io".format(i % USERS)
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = client.post("/sessions", data={
+            "email": email, "password": "pwd{}".format(i % USERS)})
+        results.append((time.perf_counter() - start, response.status_code))
+
+
+def probe(session_id: str, stop: threading.Event, results: list) -> None:
+    """Fetches the profile until stop, recording latency."""
+    client = app.test_client()
+    client.set_cookie("localhost", "session_id", session_id)
+    while not stop.is_set():
+        start = time.perf_counter()
+        assert client.get("/profile").status_code == 200
+        results.append(time.perf_counter() - start)
+        time.sleep(0.01)
+
+
+def percentile(values: list, p: int) -> float:
+    """Returns the p-th percentile of values, in milliseconds."""
+    values = sorted(values)
+    return values[len(values) * p // 100] * 1000 if values else 0
+
+
+for i in range(USERS):
+    AUTH.register_user("user{}@hbtn.io".format(i), "pwd{}".format(i))
+AUTH.register_user("probe@hbtn.io", "pwd")
+session_id = AUTH.create_session("probe@hbtn.io")
+
+for name, pool_size in (("inline", 0), ("pool", hashing.POOL_SIZE)):
+    hashing._SERVICE = hashing.HashingService(pool_size=pool_size)
+    hashing._SERVICE.check_password("warm up", hashing.hash_password(b"x"))
+    stop = threading.Event()
+    results = []
+    profiles = []
+    threads = [threading.Thread(target=worker, args=(i, stop, results))
+               for i in range(THREADS)]
+    threads.append(threading.Thread(target=probe,
+                                    args=(session_id, stop, profiles)))
+    for thread in threads:
+        thread.start()
+    time.sleep(SECONDS)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    hashing._SERVICE.shutdown()
+
+    latencies = [t for t, status in results if status == 200]
+    overloaded = sum(1 for _, status in results if status == 503)
+    print("{} ({} workers), {} threads: {:.1f} logins/s, p50 {:.0f} ms, "
+          "p99 {:.0f} ms, {} x 503; /profile p50 {:.1f} ms, "
+          "p99 {:.1f} ms".format(
+              name, pool_size, THREADS, len(latencies) / SECONDS,
+              percentile(latencies, 50), percentile(latencies, 99),
+              overloaded, percentile(profiles, 50),
+              percentile(profiles, 99)))
@@ -2,32 +2,72 @@
 """
 DB module
 """
+from typing import List
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.orm.session import Session
-from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.exc import IntegrityError, InvalidRequestError
 from sqlalchemy.orm.exc import NoResultFound
 
 from user import User, Base
 
 
+def migrate(engine: Engine) -> List[str]:
+    """Brings an existing database up to the current schema.
+
+    Creates the missing tables, then the indexes declared on the models
+    that a database created before them lacks. Creating the unique
+    index on users.email fails with IntegrityError if two users share
+    an email; they must be merged first.
+
+    Args:
+        engine (Engine): The engine of the database to migrate.
+
+    Returns:
+        List[str]: The names of the indexes created.
+    """
+    Base.metadata.create_all(engine)
+    created = []
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {index["name"] for index in
+                        connection.dialect.get_indexes(connection,
+                                                       table.name)}
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                if index.name not in existing:
+                    index.create(connection)
+                    created.append(index.name)
+    return created
+
+
 class DB:
     """DB class for interacting with the database."""
 
-    def __init__(self) -> None:
-        """Initialize a new DB instance."""
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
-        Base.metadata.create_all(self._engine)
-        self.__session = None
+    def __init__(self, url: str = "sqlite:///a.db",
+                 reset: bool = True) -> None:
+        """Initialize a new DB instance.
+
+        Args:
+            url (str): The database URL.
+            reset (bool): Drop and recreate the tables, instead of
+                migrating the existing ones to the current schema.
+        """
+        self._engine = create_engine(url, echo=False)
+        if reset:
+            Base.metadata.drop_all(self._engine)
+            Base.metadata.create_all(self._engine)
+        else:
+            migrate(self._engine)
+        # Built once here: threads racing to build it on first use
+        # would each get their own registry of sessions
+        self.__session = scoped_session(sessionmaker(bind=self._engine))
 
     @property
     def _session(self) -> Session:
-        """Memoized session object."""
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
+        """Session object, local to the calling thread."""
         return self.__session
 
     def add_user(self, email: str, hashed_password: str) -> User:
@@ -39,10 +79,18 @@ class DB:
 
         Returns:
             User: The newly added User object.
+
+        Raises:
+            ValueError: If a user with the given email already exists.
         """
         user = User(email=email, hashed_password=hashed_password)
         self._session.add(user)
-        self._session.commit()  # Save to the database
+        try:
+            self._session.commit()  # Save to the database
+        except IntegrityError:
+            # The unique index on email caught a concurrent registration
+            self._session.rollback()
+            raise ValueError(f"User {email} already exists")
         return user
 
     def find_user_by(self, **kwargs) -> User:
@@ -90,3 +138,30 @@ class DB:
 
         # Commit the changes to the database
         self._session.commit()
+
+    def update_user_if(self, user_id: int, expected: dict,
+                       **kwargs) -> bool:
+        """
+        Updates a user's attributes only if the stored ones still have
+        the expected values, in a single UPDATE statement.
+
+        :param user_id: The ID of the user to update.
+        :param expected: The attributes the stored user must still have.
+        :param kwargs: The user's attributes to update.
+        :return: True if the user was updated, False if it was not found
+            or changed since it was read.
+        :raises ValueError: If a given attribute does not exist on the
+            User model.
+        """
+        for key in {**expected, **kwargs}:
+            if not hasattr(User, key):
+                raise ValueError(
+                    f"Attribute '{key}' does not exist on User model.")
+        count = self._session.query(User).filter_by(
+            id=user_id, **expected).update(kwargs)
+        self._session.commit()
+        return count == 1
+
+    def remove_session(self) -> None:
+        """Closes the session of the calling thread, if it has one."""
+        self.__session.remove()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Hashing service running bcrypt off the request thread
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, Union
+
+import bcrypt
+
+# Number of worker processes, 0 to hash inline on the calling thread
+POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", str(os.cpu_count() or 1)))
+# Number of jobs that may wait for a free worker
+QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", str(4 * max(POOL_SIZE, 1))))
+# Seconds a caller waits for room in the queue before giving up
+QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", "1"))
+# Seconds one bcrypt hash should take on this machine
+TARGET_TIME = float(os.getenv("HASH_TARGET_TIME", "0.25"))
+# Fixed bcrypt cost, skipping calibration
+ROUNDS = int(os.getenv("HASH_ROUNDS", "0"))
+# Bounds of the calibrated bcrypt cost, the floor being the cost of
+# the hashes stored before calibration
+MIN_ROUNDS = 12
+MAX_ROUNDS = 16
+
+logger = logging.getLogger(__name__)
+
+
+class HashingOverloaded(Exception):
+    """Raised when the hashing queue stays full for QUEUE_TIMEOUT."""
+
+
+def hash_password(password: bytes, rounds: int = 12) -> bytes:
+    """
+    Hashes a password with a new bcrypt salt.
+
+    Args:
+        password (bytes): The password to be hashed.
+        rounds (int): The bcrypt cost, log2 of the work factor.
+
+    Returns:
+        bytes: The hashed password.
+    """
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def hash_rounds(hashed_password: Union[bytes, str]) -> Optional[int]:
+    """
+    Returns the cost of a bcrypt hash, read from its "$2b$<cost>$" prefix.
+
+    Args:
+        hashed_password (bytes or str): The bcrypt hash.
+
+    Returns:
+        int or None: The cost, or None if the hash is not bcrypt.
+    """
+    try:
+        return int(hashed_password[4:6])
+    except (TypeError, ValueError):
+        return None
+
+
+def calibrate(target_time: float, base_rounds: int = 8) -> tuple:
+    """
+    Picks the bcrypt cost whose hash takes closest to target_time.
+
+    Each round doubles the work, so the best of three hashes at
+    base_rounds is extrapolated to the target, and the result is
+    clamped to MIN_ROUNDS..MAX_ROUNDS.
+
+    Args:
+        target_time (float): Seconds one hash should take.
+        base_rounds (int): The cheap cost actually measured.
+
+    Returns:
+        tuple: The cost and the estimated seconds of one hash at it.
+    """
+    elapsed = math.inf
+    for _ in range(3):
+        start = time.perf_counter()
+        hash_password(b"calibration", base_rounds)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    elapsed = max(elapsed, 1e-6)
+    rounds = base_rounds + round(math.log2(target_time / elapsed))
+    rounds = min(max(rounds, MIN_ROUNDS), MAX_ROUNDS)
+    return rounds, elapsed * 2 ** (rounds - base_rounds)
+
+
+def check_password(password: bytes, hashed_password: bytes) -> bool:
+    """
+    Checks a password against a bcrypt hash.
+
+    Args:
+        password (bytes): The password to check.
+        hashed_password (bytes): The stored bcrypt hash.
+
+    Returns:
+        bool: True if the password matches, False otherwise.
+    """
+    return bcrypt.checkpw(password, hashed_password)
+
+
+class HashingService:
+    """
+    Runs bcrypt jobs in a pool of worker processes.
+
+    At most pool_size jobs run and queue_size jobs wait at once. A
+    caller finding the queue full blocks for up to timeout seconds,
+    which slows clients down under load, then gets HashingOverloaded
+    instead of piling more work on the pool.
+
+    New hashes use the cost calibrated, on first use and in a worker,
+    to take target_time, unless rounds fixes it. Hashes cheaper than
+    that are stale, and needs_rehash() tells the caller to replace
+    them; dearer ones are kept, so a calibration slowed down by a busy
+    machine never weakens stored hashes. stats() reports the
+    calibration, how many checked hashes were stale, and how many the
+    caller reported replaced with record_rehash().
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE,
+                 queue_size: int = QUEUE_SIZE,
+                 timeout: float = QUEUE_TIMEOUT,
+                 target_time: float = TARGET_TIME,
+                 rounds: int = ROUNDS):
+        """
+        Initializes the service. Worker processes start on first use.
+
+        Args:
+            pool_size (int): Number of worker processes, 0 for inline.
+            queue_size (int): Number of jobs that may wait for a worker.
+            timeout (float): Seconds to wait for room in the queue.
+            target_time (float): Seconds one hash should take.
+            rounds (int): Fixed bcrypt cost, 0 to calibrate it.
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.target_time = target_time
+        self._rounds = rounds or None
+        self._calibration = None
+        self._checked = 0
+        self._stale = 0
+        self._rehashed = 0
+        self._slots = threading.BoundedSemaphore(
+            max(pool_size, 1) + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._calibration_lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Memoized process pool."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(self.pool_size)
+        return self._executor
+
+    def _run(self, job: Callable, *args):
+        """
+        Runs job(*args) in the pool and waits for its result, once more
+        in a new pool if a worker process died.
+
+        Raises:
+            HashingOverloaded: If no slot frees up within timeout, or
+                the new pool breaks too.
+        """
+        try:
+            return self._submit(job, *args)
+        except BrokenProcessPool:
+            logger.warning("hashing worker died, restarting the pool")
+        try:
+            return self._submit(job, *args)
+        except BrokenProcessPool:
+            raise HashingOverloaded("hashing pool is broken")
+
+    def _submit(self, job: Callable, *args):
+        """
+        Runs job(*args) in the pool and waits for its result, dropping
+        the pool if it is broken so that the next job starts a new one.
+
+        Raises:
+            HashingOverloaded: If no slot frees up within timeout.
+            BrokenProcessPool: If a worker process died.
+        """
+        # Step 1: Take a slot, waiting for one if the queue is full
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashingOverloaded("hashing queue is full")
+
+        # Step 2: Run the job inline or in a worker process
+        if self.pool_size <= 0:
+            try:
+                return job(*args)
+            finally:
+                self._slots.release()
+        executor = self.executor
+        try:
+            future: Future = executor.submit(job, *args)
+        except BaseException as e:
+            self._slots.release()
+            if isinstance(e, BrokenProcessPool):
+                self._drop_executor(executor)
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        # Step 3: Wait for the worker
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self._drop_executor(executor)
+            raise
+
+    def _drop_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Forgets a broken process pool, unless already replaced."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    @property
+    def rounds(self) -> int:
+        """Bcrypt cost of new hashes, calibrated on first use."""
+        if self._rounds is None:
+            with self._calibration_lock:
+                if self._rounds is None:
+                    start = time.perf_counter()
+                    rounds, estimate = self._run(calibrate, self.target_time)
+                    self._calibration = {
+                        "rounds": rounds,
+                        "target_seconds": self.target_time,
+                        "estimated_seconds": estimate,
+                        "duration_seconds": time.perf_counter() - start,
+                    }
+                    self._rounds = rounds
+                    logger.info("bcrypt cost calibrated to %d rounds "
+                                "(%.3f s per hash, target %.3f s)",
+                                rounds, estimate, self.target_time)
+        return self._rounds
+
+    def hash_password(self, password: str) -> bytes:
+        """
+        Hashes a password in the pool, at the calibrated cost.
+
+        Args:
+            password (str): The password to be hashed.
+
+        Returns:
+            bytes: The hashed password.
+        """
+        return self._run(hash_password, password.encode('utf-8'),
+                         self.rounds)
+
+    def needs_rehash(self, hashed_password: Union[bytes, str]) -> bool:
+        """
+        Tells whether a hash that just checked successfully is cheaper
+        than the current cost, and counts it as checked and stale.
+
+        Args:
+            hashed_password (bytes or str): The stored bcrypt hash.
+
+        Returns:
+            bool: True if the hash should be replaced.
+        """
+        rounds = hash_rounds(hashed_password)
+        stale = rounds is None or rounds < self.rounds
+        with self._lock:
+            self._checked += 1
+            if stale:
+                self._stale += 1
+        return stale
+
+    def record_rehash(self) -> None:
+        """Counts a stale hash the caller replaced with a new one."""
+        with self._lock:
+            self._rehashed += 1
+
+    def stats(self) -> dict:
+        """
+        Returns the calibration and rehash counters.
+
+        Returns:
+            dict: The cost of new hashes, the calibration (None when the
+                cost is fixed or not calibrated yet), the number of
+                checked, stale and rehashed hashes, and the ratio of
+                rehashed to checked ones.
+        """
+        with self._lock:
+            return {
+                "rounds": self._rounds,
+                "calibration": self._calibration,
+                "checked": self._checked,
+                "stale": self._stale,
+                "rehashed": self._rehashed,
+                "rehash_rate": (self._rehashed / self._checked
+                                if self._checked else 0.0),
+            }
+
+    def check_password(self, password: str, hashed_password: bytes) -> bool:
+        """
+        Checks a password against a bcrypt hash in the pool.
+
+        Args:
+            password (str): The password to check.
+            hashed_password (bytes): The stored bcrypt hash.
+
+        Returns:
+            bool: True if the password matches, False otherwise.
+        """
+        return self._run(check_password, password.encode('utf-8'),
+                         hashed_password)
+
+    def shutdown(self) -> None:
+        """Stops the worker processes, waiting for running jobs."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_hashing_service() -> HashingService:
+    """
+    Returns the hashing service shared by the whole process.
+
+    Returns:
+        HashingService: The service configured from the environment.
+    """
+    global _SERVICE
+    if _SERVICE is None:
+        with _SERVICE_LOCK:
+            if _SERVICE is None:
+                _SERVICE = HashingService()
+    return _SERVICE
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Migrates an existing database to the current schema, creating the
+indexes it lacks
+
+Usage: ./migrate.py [database URL, default sqlite:///a.db]
+"""
+
+import sys
+
+from sqlalchemy import create_engine
+
+from db import migrate
+
+if __name__ == "__main__":
+    url = sys.argv[1] if len(sys.argv) > 1 else "sqlite:///a.db"
+    created = migrate(create_engine(url))
+    print("created indexes: {}".format(", ".join(created) or "none"))
@@ -17,18 +17,22 @@ class User(Base):
 
     Attributes:
         id (int): The user's ID, which is the primary key.
-        email (str): The user's email, non-nullable.
+        email (str): The user's email, non-nullable and unique.
         hashed_password (str): The user's hashed password, non-nullable.
         session_id (str): The user's session ID, nullable.
         reset_token (str): The user's reset token, nullable.
+
+    email, session_id and reset_token are indexed, as every login,
+    profile fetch and password reset looks a user up by one of them.
     """
     __tablename__ = 'users'
 
     id: int = Column(Integer, primary_key=True)
-    email: str = Column(String(250), nullable=False)
+    email: str = Column(String(250), nullable=False, unique=True,
+                        index=True)
     hashed_password: str = Column(String(250), nullable=False)
-    session_id: str = Column(String(250), nullable=True)
-    reset_token: str = Column(String(250), nullable=True)
+    session_id: str = Column(String(250), nullable=True, index=True)
+    reset_token: str = Column(String(250), nullable=True, index=True)
 
     def __init__(
             self,